@@ -0,0 +1,81 @@
+"""Per-report test-matching latency versus catalog size.
+
+Compares the legacy per-test regex loop with ``meesha.matcher.TestMatcher`` on a
+synthetic report and checks both give identical results.
+
+    python benchmarks/bench_matcher.py [--sizes 100 1000 5000] [--lines 400]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meesha.matcher import TestMatcher
+
+WORDS = ["serum", "total", "free", "direct", "indirect", "urine", "plasma", "ratio", "index", "count"]
+
+
+def make_catalog(size, seed=7):
+    rnd = random.Random(seed)
+    names = []
+    while len(names) < size:
+        stem = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 9)))
+        name = f"{rnd.choice(WORDS).title()} {stem.title()}" if rnd.random() < 0.5 else stem.upper()
+        if name not in names: names.append(name)
+    return names
+
+
+def make_report(names, lines, seed=11):
+    rnd = random.Random(seed)
+    picked = rnd.sample(names, min(len(names), lines // 2))
+    out = ["Patient Name: Mrs. Jane Doe", "Patient Id: 12345", "Age: 42 Years / Female"]
+    for i in range(lines):
+        if i % 2 == 0 and picked:
+            out.append(f"{picked.pop()} : {rnd.uniform(0.1, 400):.2f} mg/dL 1.0 - 5.0")
+        else:
+            out.append("Method: " + " ".join(rnd.choice(WORDS) for _ in range(6)))
+    return "\n".join(out) + "\n"
+
+
+def legacy_scan(names, text):
+    found = {}
+    for name in names:
+        m = re.search(rf"{re.escape(name)}[^0-9\n]*?(\d+\.?\d*)", text, re.IGNORECASE | re.DOTALL)
+        if m: found[name] = m.group(1)
+    return found
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'catalog':>8} {'legacy ms':>10} {'matcher ms':>11} {'build ms':>9} {'hits':>6}")
+    for size in args.sizes:
+        names = make_catalog(size)
+        text = make_report(names, args.lines)
+        t0 = time.perf_counter(); matcher = TestMatcher(names); build = time.perf_counter() - t0
+        expected = legacy_scan(names, text)
+        got = matcher.scan(text)
+        if got != expected:
+            sys.exit(f"mismatch at catalog size {size}: {len(got)} vs {len(expected)} hits")
+        legacy = timed(lambda: legacy_scan(names, text), args.repeat)
+        fast = timed(lambda: matcher.scan(text), args.repeat)
+        print(f"{size:>8} {legacy * 1e3:>10.1f} {fast * 1e3:>11.2f} {build * 1e3:>9.1f} {len(got):>6}")
+
+
+if __name__ == "__main__":
+    main()
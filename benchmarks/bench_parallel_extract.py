@@ -0,0 +1,66 @@
+"""Sequential vs parallel page extraction on one large synthetic bundle.
+
+    python benchmarks/bench_parallel_extract.py [--pages 400] [--workers 1 2 4 8] [--repeat 3]
+
+Checks that every worker count yields exactly the sequential ``(page, text)``
+stream, then prints the best wall time per worker count and the speed-up over
+sequential extraction. Scaling needs as many idle cores as workers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_catalog_rows, make_report_pdf
+
+from meesha import config
+from meesha.extract import iter_page_texts
+
+
+def best_time(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--tests", type=int, default=2000, help="result lines spread over the pages")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Thresholds off: this measures the split itself, whatever the bundle size.
+    config.EXTRACT_PARALLEL_MIN_PAGES = config.EXTRACT_PARALLEL_MIN_BYTES = 0
+    rows = make_catalog_rows(args.tests)
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(make_report_pdf(rows, args.tests, args.pages))
+    try:
+        baseline, expected = best_time(lambda: list(iter_page_texts(path, workers=1)), args.repeat)
+        print(f"{len(expected)} pages with text, {os.path.getsize(path) / 1e6:.1f} MB")
+        print(f"workers  1: {baseline * 1000:8.1f} ms")
+        failed = False
+        for workers in sorted(set(args.workers) - {1}):
+            list(iter_page_texts(path, workers=workers))  # starts the pool outside the timing
+            elapsed, got = best_time(lambda: list(iter_page_texts(path, workers=workers)), args.repeat)
+            same = got == expected
+            failed |= not same
+            print(f"workers {workers:2d}: {elapsed * 1000:8.1f} ms  x{baseline / elapsed:.2f}"
+                  f"{'' if same else '  OUTPUT DIFFERS'}")
+    finally:
+        os.unlink(path)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
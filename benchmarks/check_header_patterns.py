@@ -0,0 +1,65 @@
+"""Guards the header patterns against catastrophic backtracking.
+
+Runs every header pattern, the combined scan and ``extract_header`` on inputs
+built to trigger super-linear matching (long whitespace, digit and word runs,
+repeated keywords with no value) at two sizes, and fails if a search takes longer
+than the budget or grows super-linearly (a quadratic pattern takes ~4x as long
+when the input doubles; a linear one ~2x).
+
+    python benchmarks/check_header_patterns.py [--size 50000] [--budget-ms 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meesha.header import COMBINED_PATTERN, HEADER_PATTERNS, extract_header
+
+PATHOLOGICAL = {
+    "spaces after id": lambda n: "Patient Id" + " " * n + "x",
+    "spaces after dr": lambda n: "Ref By" + " " * n + "x",
+    "spaces after date": lambda n: "Reported On" + " " * n + "x",
+    "spaces after name": lambda n: "Name" + " " * n + "1",
+    "digit run": lambda n: "1" * n,
+    "digits and spaces": lambda n: "1 " * (n // 2),
+    "digit + word run": lambda n: "1" + "a" * n,
+    "repeated id": lambda n: "id: " * (n // 4),
+    "repeated name": lambda n: "Name 1" * (n // 6),
+    "repeated dr": lambda n: "Dr. " * (n // 4),
+    "name letter run": lambda n: "Name " + "ab " * (n // 3) + "1",
+    "slash soup": lambda n: "12 /- " * (n // 6),
+}
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - t0) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000, help="largest input length")
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="max time per search at --size")
+    parser.add_argument("--max-growth", type=float, default=3.0, help="max slowdown when the input doubles")
+    args = parser.parse_args()
+
+    failures = 0
+    for case, make in PATHOLOGICAL.items():
+        small, big = make(args.size // 2), make(args.size)
+        checks = [(f"pattern {f}", p.search) for f, p in HEADER_PATTERNS.items()]
+        checks += [("combined", lambda t: list(COMBINED_PATTERN.finditer(t))), ("extract_header", extract_header)]
+        for label, fn in checks:
+            t_small, t_big = timed(fn, small), timed(fn, big)
+            # Growth is only meaningful above timer noise.
+            ok = t_big <= args.budget_ms and (t_big < 20 or t_big <= t_small * args.max_growth)
+            failures += not ok
+            if not ok: print(f"FAIL {case:>20} {label:<22} {t_small:8.2f} ms -> {t_big:8.2f} ms")
+    print(f"{len(PATHOLOGICAL)} inputs, {failures} failing searches at {args.size} chars")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Import-time check for the app, service and worker entry points.
+
+Imports each startup path (the Streamlit app, the HTTP service, the batch/job
+worker modules) in a fresh interpreter under ``python -X importtime`` and fails
+(exit 1) if any heavy PDF/data/template dependency comes in with it: those
+belong inside the stage that uses them. Modules the framework itself loads
+(``streamlit`` for the app) are imported first and not counted.
+
+Import time is compared with a fixed set of standard-library imports timed the
+same way on the same machine, so the budget holds on slow or shared CI runners;
+the path fails only when it is over ``--budget-ratio`` times that reference.
+``--budget-ms`` adds an absolute ceiling for local use.
+
+    python benchmarks/check_import_time.py [--budget-ratio 2.0] [--budget-ms MS] [--runs 5]
+"""
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, modules imported first and not counted, modules measured)
+STARTUP_PATHS = [
+    ("app", ("streamlit",), ("streamlit_app",)),
+    ("service", (), ("meesha.service",)),
+    ("workers", (), ("meesha.assets", "meesha.cache", "meesha.catalog", "meesha.config", "meesha.instrument",
+                     "meesha.jobs", "meesha.overlay", "meesha.profiles", "meesha.render", "meesha.template",
+                     "meesha.batch")),
+]
+HEAVY_MODULES = ("pandas", "numpy", "pdfplumber", "pypdf", "pdfkit", "jinja2", "pdfminer", "pyarrow")
+REFERENCE_MODULES = ("argparse", "asyncio", "decimal", "email.message", "http.client", "json", "logging",
+                     "urllib.request", "xml.etree.ElementTree")
+
+
+def import_profile(modules, preload=()):
+    """``[(name, self_us, cumulative_us, depth)]`` from one ``-X importtime`` run in a fresh interpreter."""
+    code = "".join(f"import {m}\n" for m in preload) + "import sys; sys.stderr.write('--measure--\\n')\n"
+    code += f"import {', '.join(modules)}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    if proc.returncode != 0: sys.exit(f"importing {modules} failed:\n{proc.stderr}")
+    rows = []
+    for line in proc.stderr.partition("--measure--\n")[2].splitlines():
+        if not line.startswith("import time:") or "|" not in line: continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit(): continue  # header line
+        rows.append((name.strip(), int(own), int(cumulative), len(name) - len(name.lstrip()) - 1))
+    return rows
+
+
+def owned(rows, modules):
+    """``(microseconds, names)`` of the measured modules and everything they import.
+
+    Framework modules loaded lazily while a measured module runs (``streamlit.*``
+    pulled in by ``st.set_page_config``) are the framework's and are left out.
+    """
+    total, names, stack = 0, set(), []
+    for name, own, _, depth in reversed(rows):  # importtime prints children before their parent
+        while stack and stack[-1][0] >= depth: stack.pop()
+        parent_counted = stack[-1][1] if stack else False
+        counted = name in modules or name.startswith("meesha") or (parent_counted and not name.startswith("streamlit"))
+        if counted: total += own; names.add(name)
+        stack.append((depth, counted))
+    return total, names
+
+
+def best(measure, runs):
+    return min(measure() for _ in range(runs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ratio", type=float, default=2.0,
+                        help="max import time of a startup path relative to the stdlib reference imports")
+    parser.add_argument("--budget-ms", type=float, help="optional absolute ceiling per startup path")
+    parser.add_argument("--runs", type=int, default=5, help="take the fastest of this many runs")
+    args = parser.parse_args()
+
+    reference = best(lambda: sum(c for n, _, c, d in import_profile(REFERENCE_MODULES)
+                                 if d == 0 and n in REFERENCE_MODULES), args.runs)
+    print(f"stdlib reference imports: {reference / 1000:.1f} ms")
+    failed = False
+    for label, preload, modules in STARTUP_PATHS:
+        missing = [m for m in preload if importlib.util.find_spec(m) is None]
+        if missing:
+            print(f"{label}: skipped ({', '.join(missing)} not installed)")
+            continue
+        heavy, times = set(), []
+        for _ in range(args.runs):
+            us, names = owned(import_profile(modules, preload), modules)
+            heavy |= {name for name in names if name.split(".")[0] in HEAVY_MODULES}
+            times.append(us)
+        ms, ratio = min(times) / 1000, min(times) / reference
+        print(f"{label}: {ms:.1f} ms, {ratio:.2f}x reference (budget {args.budget_ratio:g}x"
+              f"{f', {args.budget_ms:g} ms' if args.budget_ms else ''})")
+        if heavy:
+            print(f"  FAIL heavy modules imported at startup: {', '.join(sorted(heavy))}")
+            failed = True
+        if ratio > args.budget_ratio or (args.budget_ms and ms > args.budget_ms):
+            print(f"  FAIL over budget; run `python -X importtime -c 'import {modules[0]}'` to see where the time goes")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Checks that rendering a summary never touches the network.
+
+Builds a synthetic report, runs analysis and both summary paths (HTML for
+wkhtmltopdf, and the in-process overlay when pypdf is installed) under an audit
+hook that records every socket connect and DNS lookup, and fails (exit 1) if:
+
+- anything in the process tried to reach the network;
+- the summary HTML references an http(s) or protocol-relative resource;
+- a font weight the template uses has no inlined ``@font-face`` (it would fall
+  back, or be fetched by a template edit that re-adds a web font).
+
+When wkhtmltopdf is installed the HTML is also rendered through it with a dead
+proxy and load errors set to abort, so any remote fetch fails the render.
+
+    python benchmarks/check_offline_render.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_catalog_rows, make_report_pdf, write_catalog
+
+from meesha.assets import find_remote_resources, font_face_css, logo_b64
+from meesha.pipeline import analyze_report, render_summary_html, render_summary_pdf
+from meesha.render import WkhtmltopdfRenderer, get_wkhtmltopdf_config
+
+NETWORK_EVENTS = ("socket.connect", "socket.getaddrinfo", "socket.gethostbyname", "socket.sendto",
+                  "urllib.Request")
+URL = re.compile(r"(?:https?:)?//[\w.-]+\.[a-z]{2,}[^\s'\")<>]*", re.IGNORECASE)
+DEAD_PROXY = "http://127.0.0.1:9"
+
+attempts = []
+
+
+def audit(event, args):
+    if event in NETWORK_EVENTS: attempts.append((event, args[1:] if event in ("socket.connect", "socket.sendto") else args))
+
+
+def main():
+    sys.addaudithook(audit)
+    failures = []
+    tmp = tempfile.mkdtemp(prefix="meesha-offline-")
+    csv_path = os.path.join(tmp, "test_and_values.csv")
+    rows = make_catalog_rows(200)
+    write_catalog(csv_path, rows)
+    pdf = make_report_pdf(rows, 40, 2)
+
+    info, full_results, narrative = analyze_report(pdf, csv_path)
+    html = render_summary_html(info, full_results, narrative, logo_b64())
+    print(f"summary HTML: {len(html) / 1024:.0f} KB, {len(full_results)} tests")
+
+    remote = find_remote_resources(html)
+    if remote: failures.append(f"remote resources in summary HTML: {', '.join(remote[:5])}")
+    # data: URIs are base64, which never contains "//" followed by a dotted host.
+    urls = sorted(set(URL.findall(re.sub(r"data:[^)'\"]+", "", html))))
+    if urls: failures.append(f"URLs in summary HTML: {', '.join(urls[:5])}")
+
+    used = {int(w) for w in re.findall(r"font-weight:\s*(\d{3})", html)} | {400}
+    faces = set()
+    for weight in re.findall(r"font-weight: (\d{3}(?: \d{3})?);", font_face_css()):
+        lo, _, hi = weight.partition(" ")
+        faces |= set(range(int(lo), int(hi or lo) + 1, 100))
+    if not faces: failures.append("no fonts bundled in meesha/fonts; the summary falls back to sans-serif")
+    elif used - faces: failures.append(f"font weights without an inlined face: {sorted(used - faces)}")
+
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("overlay: skipped (pypdf not installed)")
+    else:
+        render_summary_pdf(info, full_results, narrative, logo_b64())
+        print("overlay: rendered")
+
+    if get_wkhtmltopdf_config():
+        renderer = WkhtmltopdfRenderer({"proxy": DEAD_PROXY, "load-error-handling": "abort",
+                                        "load-media-error-handling": "abort"})
+        try:
+            renderer.render(html)
+            print("wkhtmltopdf: rendered with network loads disabled")
+        except Exception as e:
+            failures.append(f"wkhtmltopdf render tried to load something remote: {e}")
+    else:
+        print("wkhtmltopdf: skipped (not installed)")
+
+    if attempts: failures.append("network access while rendering: " + "; ".join(f"{e} {a}" for e, a in attempts[:5]))
+    for failure in failures: print("FAIL " + failure)
+    if not failures: print("ok: no network access")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
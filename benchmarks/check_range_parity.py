@@ -0,0 +1,79 @@
+"""Checks the reference-range index against the original row-by-row selection.
+
+Builds random catalogs (overlapping and gapped age bands, NaN ages, numeric and
+non-numeric strings where numbers belong, missing or odd ``sextype`` values),
+then looks up every test at every interesting age for each sex with both
+``RangeIndex`` and a copy of the loop the app used before it, and fails (exit 1)
+on any difference.
+
+    python benchmarks/check_range_parity.py [--catalogs 20000] [--seed 2]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meesha.ranges import LazyRangeIndex, RangeIndex
+
+DROPPED = "dropped"
+AGES = [0, 4, 5, 10, 17, 18, 30, 45, 60, 99, 100, 121]
+SEXES = ["Male", "Female", "Both"]
+FROM_AGES = [0, 5, 10, 18, 40, 60, 18.0, float("nan"), "45", "45.0", "adult", None]
+TO_AGES = [4, 17, 18, 45, 60, 99, 120, 45.0, float("nan"), "60", "senior", None]
+SEX_TYPES = ["Both", "Male", "Female", "male", "BOTH", "both", float("nan"), None]
+
+
+def legacy_lookup(rows, name, age, sex):
+    """The app's original selection over ``(testname, fromage, toage, sextype, low, high)`` rows."""
+    test_rows = [r for r in rows if r[0] == name]
+    ref_row = test_rows[0]
+    try:
+        for row in test_rows:
+            if row[1] <= age <= row[2]:
+                if row[3] == "Both" or row[3].lower() == sex.lower():
+                    ref_row = row
+                    break
+    except Exception:
+        return DROPPED  # the app skipped the test
+    return ref_row[4], ref_row[5]
+
+
+def random_catalog(rng):
+    rows = []
+    for _ in range(rng.randint(1, 8)):
+        rows.append((rng.choice("AB"), rng.choice(FROM_AGES), rng.choice(TO_AGES), rng.choice(SEX_TYPES),
+                     rng.random(), rng.random()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalogs", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lookups = mismatches = 0
+    for _ in range(args.catalogs):
+        rows = random_catalog(rng)
+        eager = RangeIndex(*zip(*rows))
+        lazy = LazyRangeIndex(lambda name: [r[1:] for r in rows if r[0] == name] or None)
+        for name in {r[0] for r in rows}:
+            for age in AGES:
+                for sex in SEXES:
+                    expected = legacy_lookup(rows, name, age, sex)
+                    for index in (eager, lazy):
+                        got = index.lookup(name, age, sex)
+                        lookups += 1
+                        if (DROPPED if got is None else got) == expected: continue
+                        mismatches += 1
+                        if mismatches <= 5:
+                            print(f"FAIL {name} age={age} sex={sex}: expected {expected}, got {got}\n  rows={rows}")
+    print(f"{lookups} lookups over {args.catalogs} catalogs, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
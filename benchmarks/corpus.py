@@ -0,0 +1,102 @@
+"""Synthetic lab-report corpus: reference catalogs and text PDFs, built offline.
+
+The PDF writer is deliberately tiny (Helvetica text lines, no dependencies) but
+produces files pdfplumber and pypdf read like real text-based lab reports.
+"""
+import csv
+import random
+
+WORDS = ["serum", "total", "free", "direct", "indirect", "urine", "plasma", "ratio", "index", "count"]
+# Real analyte names first so the status/body-zone stages see realistic hits.
+KNOWN_TESTS = ["Haemoglobin", "Total Cholesterol", "HDL Cholesterol", "LDL Cholesterol", "Triglycerides",
+               "SGOT", "SGPT", "Serum Creatinine", "Blood Urea", "Uric Acid", "Calcium", "Vitamin D",
+               "Vitamin B12", "TSH", "Platelet Count", "WBC Count", "RBC Count", "MCV", "MCH", "GGT"]
+
+
+def make_catalog_rows(size, seed=7):
+    """Returns catalog rows (dicts with the CSV columns) for ``size`` distinct tests."""
+    rnd = random.Random(seed)
+    names = list(KNOWN_TESTS[:size])
+    seen = set(names)
+    while len(names) < size:
+        stem = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 9)))
+        name = f"{rnd.choice(WORDS).title()} {stem.title()}" if rnd.random() < 0.5 else stem.upper()
+        if name not in seen: seen.add(name); names.append(name)
+
+    rows = []
+    for name in names:
+        low = round(rnd.uniform(0.5, 50), 1); high = round(low * rnd.uniform(1.5, 4), 1)
+        if rnd.random() < 0.4:
+            rows.append(dict(testname=name, fromage=0, toage=17, sextype="Both", lowvalue=round(low * 0.8, 2), uppervalue=round(high * 0.9, 2)))
+            rows.append(dict(testname=name, fromage=18, toage=120, sextype="Male", lowvalue=low, uppervalue=high))
+            rows.append(dict(testname=name, fromage=18, toage=120, sextype="Female", lowvalue=round(low * 0.9, 2), uppervalue=round(high * 0.95, 2)))
+        else:
+            rows.append(dict(testname=name, fromage=0, toage=120, sextype="Both", lowvalue=low, uppervalue=high))
+    return rows
+
+
+def write_catalog(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["TestName", "FromAge", "ToAge", "SexType", "LowValue", "UpperValue"])
+        writer.writeheader()
+        for r in rows:
+            writer.writerow({"TestName": r["testname"], "FromAge": r["fromage"], "ToAge": r["toage"],
+                             "SexType": r["sextype"], "LowValue": r["lowvalue"], "UpperValue": r["uppervalue"]})
+
+
+def make_report_lines(rows, tests, seed=11):
+    """Header block plus ``tests`` result lines drawn from the catalog."""
+    rnd = random.Random(seed)
+    bands = {}
+    for r in rows: bands.setdefault(r["testname"], r)
+    names = list(bands)
+    picked = rnd.sample(names, min(tests, len(names)))
+    lines = ["MEESHA DIAGNOSTICS - LABORATORY REPORT",
+             "Patient Name : Mrs. Jane Doe", "Patient Id : 123456", "Age/Gender : 42 Y / Female",
+             "Ref. By : Dr. A Kumar", "Reported On : 12/03/2024", ""]
+    for name in picked:
+        r = bands[name]
+        value = rnd.uniform(r["lowvalue"] * 0.5, r["uppervalue"] * 1.6)
+        lines.append(f"{name}   {value:.2f}   mg/dL   {r['lowvalue']} - {r['uppervalue']}")
+        if rnd.random() < 0.3: lines.append("Method: " + " ".join(rnd.choice(WORDS) for _ in range(6)))
+    return lines
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").encode("latin-1", "replace")
+
+
+def text_pdf(lines, lines_per_page=60, min_pages=1):
+    """Builds an A4 PDF with the given text lines (Helvetica 9pt)."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    while len(pages) < min_pages: pages.append(["Page intentionally left blank - supplementary notes"])
+
+    objs = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+            3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"}
+    kids = []
+    for n, page in enumerate(pages):
+        page_id, content_id = 4 + 2 * n, 5 + 2 * n
+        stream = bytearray(b"BT /F1 9 Tf 11 TL 40 800 Td\n")
+        for line in page: stream += b"(" + _escape(line) + b") Tj T*\n"
+        stream += b"ET"
+        objs[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), bytes(stream))
+        objs[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                         b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objs[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for num in sorted(objs):
+        offsets[num] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, objs[num])
+    xref = len(out)
+    size = max(objs) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    out += b"".join(b"%010d 00000 n \n" % offsets[i] for i in range(1, size))
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    return bytes(out)
+
+
+def make_report_pdf(rows, tests, pages=1, seed=11):
+    return text_pdf(make_report_lines(rows, tests, seed), min_pages=pages)
@@ -0,0 +1,116 @@
+"""Concurrent load against the HTTP service, with a local client only.
+
+    python benchmarks/load_service.py [--url http://127.0.0.1:8080] [--requests 200] [--concurrency 50] \
+        [--distinct 10] [--endpoint results]
+
+Without ``--url`` it starts ``meesha.service`` in-process on a free port with a
+synthetic catalog, then fires ``--requests`` uploads at it from ``--concurrency``
+keep-alive connections. Uploads cycle through ``--distinct`` synthetic reports,
+so identical concurrent uploads exercise request coalescing. Prints throughput,
+latency percentiles, the status-code mix and the service's own counters.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_catalog_rows, make_report_pdf, write_catalog
+
+from meesha.service import Service
+
+
+async def request(reader, writer, host, method, path, body=b""):
+    """One HTTP/1.1 request on an open connection; ``(status, headers, body)``."""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/pdf\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers, payload
+
+
+async def client(host, port, jobs, path, results):
+    reader = writer = None
+    while jobs:
+        pdf = jobs.pop()
+        if writer is None: reader, writer = await asyncio.open_connection(host, port)
+        start = time.perf_counter()
+        status, headers, _ = await request(reader, writer, host, "POST", path, pdf)
+        results.append((status, time.perf_counter() - start, headers.get("x-meesha-coalesced") == "1"))
+        if headers.get("connection") == "close":
+            writer.close()
+            writer = None
+    if writer is not None: writer.close()
+
+
+async def run(args):
+    service = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        tmp = tempfile.mkdtemp(prefix="meesha-service-")
+        csv_path = os.path.join(tmp, "test_and_values.csv")
+        rows = make_catalog_rows(args.catalog_tests)
+        write_catalog(csv_path, rows)
+        service = Service(csv_path, workers=args.workers, max_pending=args.max_pending)
+        await service.start("127.0.0.1", 0)
+        host, port = "127.0.0.1", service.port
+
+    rows = make_catalog_rows(args.catalog_tests)
+    pdfs = [make_report_pdf(rows, args.tests, args.pages, seed=i) for i in range(args.distinct)]
+    jobs = [pdfs[i % len(pdfs)] for i in range(args.requests)]
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, jobs, f"/v1/{args.endpoint}", results) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, _, health = await request(reader, writer, host, "GET", "/healthz")
+    writer.close()
+    if service is not None: await service.close()
+
+    latencies = sorted(t for status, t, _ in results if status == 200)
+    pct = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 1) if latencies else None
+    return {
+        "requests": len(results), "seconds": round(elapsed, 3),
+        "requests_per_sec": round(len(results) / elapsed, 2) if elapsed else None,
+        "status": dict(Counter(status for status, _, _ in results)),
+        "coalesced_responses": sum(c for _, _, c in results),
+        "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0),
+                       "mean": round(statistics.fmean(latencies) * 1000, 1) if latencies else None},
+        "service": json.loads(health),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing service (default: start one in-process)")
+    parser.add_argument("--endpoint", choices=["results", "report"], default="results")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=10, help="distinct reports among the uploads")
+    parser.add_argument("--catalog-tests", type=int, default=1000)
+    parser.add_argument("--tests", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Per-stage pipeline benchmark over a synthetic corpus, written as JSON.
+
+    python benchmarks/run.py --catalog-tests 2000 --tests 60 --pages 4 --reports 20 \
+        --renderer stub --memory --output bench.json
+
+Stages are timed separately on every report: text extraction, header regexes,
+test matching, range lookup (+ status), generate_safe_summary, map_body_impact,
+template render, PDF render and merge. ``--memory`` adds the tracemalloc peak per
+stage (slower; keep it off when comparing wall times). Nothing touches the network.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import make_catalog_rows, make_report_pdf, write_catalog
+
+from meesha.catalog import get_catalog
+from meesha.extract import iter_page_texts
+from meesha.pipeline import (analyze_matches, extract_header, generate_safe_summary, map_body_impact,
+                             merge_pdfs, render_summary_html, render_summary_pdf)
+from meesha.render import make_renderer
+
+
+class StageTimer:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.samples = {}
+
+    @contextmanager
+    def stage(self, name):
+        # Inner stages reset the tracemalloc peak, so only leaf stages report one.
+        self._depth = getattr(self, "_depth", 0) + 1
+        self._nested = False
+        if self.memory: tracemalloc.reset_peak()
+        t0 = time.perf_counter(); c0 = time.process_time()
+        yield
+        wall = time.perf_counter() - t0; cpu = time.process_time() - c0
+        peak = tracemalloc.get_traced_memory()[1] if self.memory and not self._nested else None
+        self._depth -= 1
+        self._nested = self._depth > 0
+        self.samples.setdefault(name, []).append((wall, cpu, peak))
+
+    def summary(self):
+        out = {}
+        for name, rows in self.samples.items():
+            walls = [r[0] * 1e3 for r in rows]
+            out[name] = {
+                "runs": len(rows),
+                "mean_ms": round(statistics.fmean(walls), 4),
+                "median_ms": round(statistics.median(walls), 4),
+                "p95_ms": round(sorted(walls)[max(int(len(walls) * 0.95) - 1, 0)], 4),
+                "cpu_mean_ms": round(statistics.fmean(r[1] * 1e3 for r in rows), 4),
+            }
+            peaks = [r[2] for r in rows if r[2] is not None]
+            if peaks: out[name]["peak_kb"] = round(max(peaks) / 1024, 1)
+        return out
+
+
+def run(args):
+    timer = StageTimer(args.memory)
+    if args.memory: tracemalloc.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = make_catalog_rows(args.catalog_tests)
+        csv_path = os.path.join(tmp, "test_and_values.csv")
+        write_catalog(csv_path, rows)
+        with timer.stage("catalog_load"):
+            catalog = get_catalog(csv_path)
+        pdfs = [make_report_pdf(rows, args.tests, args.pages, seed=i) for i in range(args.reports)]
+        renderer = make_renderer(args.renderer) if args.renderer != "overlay" else None
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for pdf in pdfs:
+                with timer.stage("end_to_end"):
+                    with timer.stage("text_extraction"):
+                        full_text = "\n".join(t for _, t in iter_page_texts(pdf)) + "\n"
+                    with timer.stage("header_regexes"):
+                        info = extract_header(full_text)
+                    with timer.stage("test_matching"):
+                        matches = catalog.matcher.scan(full_text)
+                    with timer.stage("range_lookup"):
+                        results = analyze_matches(info, matches, catalog)
+                    info["report_date"] = info["date"]
+                    with timer.stage("generate_safe_summary"):
+                        narrative = generate_safe_summary(info, results)
+                    with timer.stage("map_body_impact"):
+                        map_body_impact([t for t in results if t["status"] != "Normal"])
+                    if renderer is None:
+                        with timer.stage("pdf_render"):
+                            summary_pdf = render_summary_pdf(info, results, narrative)
+                    else:
+                        with timer.stage("template_render"):
+                            html = render_summary_html(info, results, narrative)
+                        with timer.stage("pdf_render"):
+                            summary_pdf = renderer.render(html)
+                    with timer.stage("merge"):
+                        merge_pdfs(summary_pdf, pdf)
+        elapsed = time.perf_counter() - start
+    if args.memory: tracemalloc.stop()
+
+    total = args.reports * args.repeat
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "params": vars(args),
+        },
+        "stages": timer.summary(),
+        "throughput": {"reports": total, "seconds": round(elapsed, 4),
+                       "reports_per_sec": round(total / elapsed, 3) if elapsed else None},
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog-tests", type=int, default=1000, help="distinct tests in the synthetic catalog")
+    parser.add_argument("--tests", type=int, default=40, help="result lines per report")
+    parser.add_argument("--pages", type=int, default=2, help="minimum pages per report")
+    parser.add_argument("--reports", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--renderer", default="stub", help="render backend (stub and overlay need no wkhtmltopdf)")
+    parser.add_argument("--memory", action="store_true", help="record tracemalloc peaks per stage")
+    parser.add_argument("--output", help="JSON file (default: stdout)")
+    args = parser.parse_args()
+
+    result = run(args)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
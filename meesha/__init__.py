@@ -0,0 +1 @@
+"""Meesha Diagnostics report pipeline helpers used by ``streamlit_app.py``."""
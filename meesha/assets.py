@@ -0,0 +1,91 @@
+"""Static report assets (logo, fonts), read and base64-encoded once per process.
+
+Everything the summary template needs is inlined as ``data:`` URIs so rendering
+never touches the network (our render hosts are air-gapped).
+"""
+import base64
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# Priority to 'image_0e9cfc.png'
+LOGO_CANDIDATES = ["image_0e9cfc.png", "meesha_logo.jpg", "jpeg meesha.jpeg", "image_0ff9db.png"]
+
+
+def get_base64_image(image_path):
+    if os.path.exists(image_path):
+        with open(image_path, "rb") as img_file:
+            return base64.b64encode(img_file.read()).decode()
+    return None
+
+
+@lru_cache(maxsize=None)
+def logo_b64(base_dir=REPO_DIR):
+    """Base64 of the first logo candidate found in base_dir, or None."""
+    for cand in LOGO_CANDIDATES:
+        cand_path = os.path.join(base_dir, cand)
+        if os.path.exists(cand_path):
+            return get_base64_image(cand_path)
+    return None
+
+
+# --- FONTS ---
+FONT_WEIGHTS = {"thin": 100, "extralight": 200, "light": 300, "regular": 400, "medium": 500,
+                "semibold": 600, "bold": 700, "extrabold": 800, "black": 900}
+FONT_FORMATS = {".ttf": ("font/ttf", "truetype"), ".otf": ("font/otf", "opentype"),
+                ".woff": ("font/woff", "woff"), ".woff2": ("font/woff2", "woff2")}
+# wkhtmltopdf's QtWebKit predates woff2, so prefer the older formats when several exist.
+FORMAT_PRIORITY = [".ttf", ".otf", ".woff", ".woff2"]
+
+
+def _font_files(font_dir, family):
+    """Maps weight (or "variable") -> best font file for family in font_dir."""
+    picked = {}
+    if not os.path.isdir(font_dir): return picked
+    for fname in sorted(os.listdir(font_dir)):
+        stem, ext = os.path.splitext(fname)
+        if ext.lower() not in FONT_FORMATS or not stem.lower().startswith(family.lower()): continue
+        if "[" in stem: weight = "variable"  # e.g. Outfit[wght].ttf
+        else:
+            suffix = re.sub(r"[^a-z]", "", stem[len(family):].lower()) or "regular"
+            weight = FONT_WEIGHTS.get(suffix)
+            if weight is None: continue
+        prev = picked.get(weight)
+        if prev is None or FORMAT_PRIORITY.index(ext.lower()) < FORMAT_PRIORITY.index(os.path.splitext(prev)[1].lower()):
+            picked[weight] = fname
+    return picked
+
+
+@lru_cache(maxsize=None)
+def font_face_css(family="Outfit", font_dir=FONT_DIR):
+    """Inlined ``@font-face`` rules for the bundled font files (empty if none are bundled)."""
+    rules = []
+    for weight, fname in sorted(_font_files(font_dir, family).items(), key=lambda kv: str(kv[0])):
+        mime, fmt = FONT_FORMATS[os.path.splitext(fname)[1].lower()]
+        with open(os.path.join(font_dir, fname), "rb") as f:
+            data = base64.b64encode(f.read()).decode()
+        weight_css = "100 900" if weight == "variable" else weight
+        rules.append(f"@font-face {{ font-family: '{family}'; font-style: normal; font-weight: {weight_css}; "
+                     f"src: url(data:{mime};base64,{data}) format('{fmt}'); }}")
+    return "\n".join(rules)
+
+
+# --- OFFLINE GUARD ---
+REMOTE_REF = re.compile(r"""(?:@import\s+(?:url\()?|url\(|\b(?:src|href)\s*=\s*)\s*['"]?((?:https?:)?//[^'")\s>]+)""", re.IGNORECASE)
+
+
+def find_remote_resources(html):
+    """Returns the remote URLs an HTML document would fetch while rendering."""
+    return REMOTE_REF.findall(html)
+
+
+@lru_cache(maxsize=None)
+def asset_version(base_dir=REPO_DIR):
+    """Short hash of the embedded assets, for cache keys."""
+    digest = hashlib.sha256((logo_b64(base_dir) or "").encode())
+    digest.update(font_face_css().encode())
+    return digest.hexdigest()[:12]
@@ -0,0 +1,192 @@
+"""Headless batch processing of lab PDFs.
+
+    python -m meesha.batch INPUT OUTPUT_DIR [--catalog test_and_values.csv] [--workers 8]
+                           [--export jsonl|parquet] [--no-pdf]
+
+INPUT is a directory (every ``*.pdf`` inside it) or a glob pattern. One merged
+report is written per input as ``Meesha_Analysis_<stem>.pdf``, in the
+subdirectory of OUTPUT_DIR matching the input's place under the inputs' common
+directory (so ``a/report.pdf`` and ``b/report.pdf`` from a recursive glob do not
+overwrite each other; names that still clash get a short hash), plus a manifest
+of the extracted values (``manifest.json`` or ``manifest.csv``). A failing file is
+recorded in the manifest and does not stop the batch. ``--export`` also writes
+the structured results (``results.jsonl`` / ``results.parquet``, see
+``meesha.results``); ``--no-pdf`` skips the summary and merge steps entirely.
+Successful reports are recorded in the patient history like the app's
+(``MEESHA_HISTORY=0`` to skip).
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from meesha import config
+from meesha.assets import logo_b64
+from meesha.instrument import trace
+from meesha.catalog import get_catalog
+from meesha.extract import extraction_share
+from meesha.history import record_report
+from meesha.pipeline import build_report, extract_comprehensive_data
+from meesha.render import make_renderer
+from meesha.results import ReportResult, write_jsonl, write_parquet
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FIELDS = ["file", "ok", "error", "output", "patient_name", "patient_id", "age_gender",
+                   "doctor", "date", "test", "value", "range", "status"]
+
+
+def collect_inputs(spec):
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "*.pdf")) + glob.glob(os.path.join(spec, "*.PDF"))
+    else:
+        paths = glob.glob(spec, recursive=True)
+    return sorted(set(paths))
+
+
+def output_paths(inputs, out_dir):
+    """``{input: output PDF path}``, mirroring each input's directory below the inputs' common one."""
+    if not inputs: return {}
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in inputs])
+    out = {}
+    for p in inputs:
+        sub, name = os.path.split(os.path.relpath(os.path.abspath(p), root))
+        out[p] = os.path.join(out_dir, sub, f"Meesha_Analysis_{os.path.splitext(name)[0]}.pdf")
+    # report.pdf and report.PDF in one directory (or on a case-insensitive disk) would still clash.
+    clashes = Counter(path.lower() for path in out.values())
+    for p, path in out.items():
+        if clashes[path.lower()] > 1:
+            stem, ext = os.path.splitext(path)
+            out[p] = f"{stem}_{hashlib.sha256(p.encode()).hexdigest()[:8]}{ext}"
+    return out
+
+
+_renderer = None
+
+
+def _get_renderer():
+    # Batch workers are already separate processes, so each renders in-process.
+    # The overlay backend needs no renderer: build_report draws it directly.
+    global _renderer
+    if config.RENDER_BACKEND == "overlay": return None
+    if _renderer is None: _renderer = make_renderer()
+    return _renderer
+
+
+def process_one(pdf_path, out_path, csv_path, logo_b64, render=True, extract_workers=None):
+    """Worker entry point: builds one report, writes it to out_path and returns its manifest record."""
+    record = {"file": pdf_path, "ok": False, "error": None, "output": None, "info": {}, "tests": []}
+    try:
+        with open(pdf_path, "rb") as f:
+            source = f.read()
+        record["sha256"] = hashlib.sha256(source).hexdigest()
+        if not render:
+            with trace("batch", os.path.basename(pdf_path)):
+                info, tests = extract_comprehensive_data(source, csv_path, extract_workers=extract_workers)
+            record.update(ok=True, info=info, tests=tests)
+            return record
+        with trace("batch", os.path.basename(pdf_path)):
+            report = build_report(source, csv_path, logo_b64, renderer=_get_renderer(), extract_workers=extract_workers)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, "wb") as f:
+            f.write(report["pdf"])
+        record.update(ok=True, output=out_path, info=report["info"], tests=report["full_results"])
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def write_manifest(records, out_dir, fmt):
+    path = os.path.join(out_dir, f"manifest.{fmt}")
+    if fmt == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2, default=str)
+        return path
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        for rec in records:
+            base = {"file": rec["file"], "ok": rec["ok"], "error": rec["error"], "output": rec["output"]}
+            base.update({k: rec["info"].get(k) for k in ("patient_name", "patient_id", "age_gender", "doctor", "date")})
+            if not rec["tests"]: writer.writerow(base)
+            for t in rec["tests"]:
+                writer.writerow(dict(base, test=t["name"], value=t["value"], range=t["range"], status=t["status"]))
+    return path
+
+
+def write_export(records, out_dir, fmt, catalog_version=None):
+    """Structured results of the successful records as ``results.jsonl`` or ``results.parquet``."""
+    results = [ReportResult.from_pipeline(r["info"], r["tests"], r["file"], catalog_version) for r in records if r["ok"]]
+    path = os.path.join(out_dir, f"results.{fmt}")
+    if fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            write_jsonl(results, f)
+    else:
+        write_parquet(results, path)
+    return path
+
+
+def run_batch(inputs, out_dir, csv_path, workers=None, manifest="json", logo_b64=None, render=True, export=None):
+    """Processes inputs over a process pool; returns ``(records, elapsed_seconds)``."""
+    os.makedirs(out_dir, exist_ok=True)
+    records = []
+    start = time.perf_counter()
+    # A batch of fewer files than workers lets each large file use the spare cores.
+    share = extraction_share(min(len(inputs), workers or os.cpu_count() or 1) - 1)
+    outputs = output_paths(inputs, out_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_one, p, outputs[p], csv_path, logo_b64, render, share): p for p in inputs}
+        for fut in as_completed(futures):
+            try:
+                rec = fut.result()
+            except Exception as e:  # worker died (e.g. BrokenProcessPool)
+                rec = {"file": futures[fut], "ok": False, "error": f"{type(e).__name__}: {e}",
+                       "output": None, "info": {}, "tests": []}
+            sha256 = rec.pop("sha256", None)
+            if not rec["ok"]: logger.warning("%s failed: %s", rec["file"], rec["error"])
+            else: record_report(rec["info"], rec["tests"], source_sha256=sha256)
+            records.append(rec)
+    elapsed = time.perf_counter() - start
+    records.sort(key=lambda r: r["file"])
+    write_manifest(records, out_dir, manifest)
+    if export: write_export(records, out_dir, export, get_catalog(csv_path).version)
+    return records, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Meesha summary reports for a batch of lab PDFs.")
+    parser.add_argument("input", help="directory of PDFs or a glob pattern")
+    parser.add_argument("output", help="directory for merged reports and the manifest")
+    parser.add_argument("--catalog", default=os.path.join(REPO_DIR, "test_and_values.csv"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--manifest", choices=["json", "csv"], default="json")
+    parser.add_argument("--export", choices=["jsonl", "parquet"], help="also write structured results")
+    parser.add_argument("--no-pdf", action="store_true", help="extract values only; no summary PDFs")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    inputs = collect_inputs(args.input)
+    if not inputs:
+        parser.error(f"no PDFs found for {args.input!r}")
+    if not os.path.exists(args.catalog):
+        parser.error(f"catalog not found: {args.catalog}")
+
+    records, elapsed = run_batch(inputs, args.output, args.catalog, args.workers, args.manifest,
+                                 logo_b64(), render=not args.no_pdf, export=args.export)
+    ok = sum(r["ok"] for r in records)
+    print(f"{ok}/{len(records)} reports in {elapsed:.1f}s "
+          f"({len(records) / elapsed if elapsed else 0:.2f} reports/sec, {len(records) - ok} failed)")
+    return 0 if ok == len(records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
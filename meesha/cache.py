@@ -0,0 +1,142 @@
+"""Content-addressed cache of finished reports.
+
+Entries are keyed by the SHA-256 of the uploaded PDF bytes combined with the
+catalog and template versions, so the same upload (a rerun, a second download or
+another staff member uploading the same file) is served without re-extracting or
+re-rendering. A report whose date could not be read is stamped with the day it
+was generated, so ``get_report``/``put_report`` file it under a key that also
+carries that day and it is never served on a later one. The in-memory tier is a size-bounded LRU; an optional on-disk tier
+survives restarts and is shared by every process pointing at the same directory.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from meesha import config
+
+
+def cache_key(pdf_bytes, catalog_version, template_version):
+    """Builds the cache key for an upload under a given catalog/template version."""
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    return hashlib.sha256(f"{digest}:{catalog_version}:{template_version}".encode()).hexdigest()
+
+
+def dated_key(key, day=None):
+    """The key for a report stamped with its generation date (today unless given): valid that day only."""
+    return hashlib.sha256(f"{key}:{day or date.today().isoformat()}".encode()).hexdigest()
+
+
+def is_date_stamped(report):
+    """True when the report shows its generation date because the PDF's own date was not found."""
+    return report["info"].get("date", "Unknown") == "Unknown"
+
+
+class ResultCache:
+    """LRU of pickled report entries bounded by total bytes and entry count."""
+
+    def __init__(self, max_bytes, max_entries=None, disk_dir=None, disk_max_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if disk_dir: os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None: self._entries.move_to_end(key)
+        if blob is None and self.disk_dir:
+            blob = self._disk_read(key)
+            if blob is not None: self._remember(key, blob)
+        return pickle.loads(blob) if blob is not None else None
+
+    def put(self, key, entry):
+        blob = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, blob)
+        if self.disk_dir: self._disk_write(key, blob)
+
+    def get_report(self, key):
+        """A finished report for key, or None; date-stamped reports only match on the day they were made."""
+        report = self.get(key)
+        return report if report is not None else self.get(dated_key(key))
+
+    def put_report(self, key, report):
+        self.put(dated_key(key) if is_date_stamped(report) else key, report)
+
+    def _remember(self, key, blob):
+        if len(blob) > self.max_bytes: return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None: self._size -= len(old)
+            self._entries[key] = blob
+            self._size += len(blob)
+            while self._size > self.max_bytes or (self.max_entries and len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    # --- DISK TIER ---
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".pkl")
+
+    def _disk_read(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            os.utime(path)  # keeps disk pruning least-recently-used
+            return blob
+        except OSError: return None
+
+    def _disk_write(self, key, blob):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except OSError: return
+        if self.disk_max_bytes: self._disk_prune()
+
+    def _disk_prune(self):
+        files = []
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".pkl"): continue
+                path = os.path.join(root, name)
+                try: st = os.stat(path)
+                except OSError: continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(f[1] for f in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes: break
+            try: os.remove(path); total -= size
+            except OSError: pass
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Returns the process-wide cache configured from ``meesha.config``."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResultCache(
+                config.RESULT_CACHE_MAX_MB * 1024 * 1024,
+                max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+                disk_dir=config.RESULT_CACHE_DIR,
+                disk_max_bytes=config.RESULT_CACHE_DISK_MAX_MB * 1024 * 1024,
+            )
+        return _default
@@ -0,0 +1,92 @@
+"""Process-wide reference catalog (``test_and_values.csv``).
+
+The CSV is parsed once per process and shared by every Streamlit session and
+worker thread. ``get_catalog`` only re-reads the file when its mtime/size change,
+and only re-parses it when the content hash changes too; the derived structures
+(unique test names, range index, matcher, body-zone table) travel with the catalog object.
+
+When a compiled catalog built from the current CSV exists (``<csv>.compiled``, see
+``meesha.compiled_catalog``) it is used instead: no pandas import, no parse, and
+reference ranges are read from the shared mmap as tests are looked up.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from meesha.classify import build_zone_table
+from meesha.compiled_catalog import open_compiled
+from meesha.matcher import TestMatcher
+from meesha.ranges import RangeIndex
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_catalogs = {}
+
+
+class ReferenceCatalog:
+    """Parsed catalog rows plus the lookup structures derived from them."""
+
+    def __init__(self, test_names, ranges, version, path=None, stat_key=None):
+        self.version = version
+        self.path = path
+        self.stat_key = stat_key
+        self.test_names = tuple(test_names)
+        self.ranges = ranges
+        self.matcher = TestMatcher(self.test_names)
+        self.zone_table = build_zone_table(self.test_names)
+
+    @classmethod
+    def from_bytes(cls, data, path=None, stat_key=None):
+        import pandas as pd
+        df = pd.read_csv(io.BytesIO(data))
+        df.columns = df.columns.str.lower().str.strip()
+        return cls(df['testname'].unique(), RangeIndex.from_frame(df), hashlib.sha256(data).hexdigest(),
+                   path=path, stat_key=stat_key)
+
+    @classmethod
+    def from_compiled(cls, compiled, path=None, stat_key=None):
+        return cls(compiled.test_names, compiled.range_index(), compiled.version, path=path, stat_key=stat_key)
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def get_catalog(csv_path):
+    """Returns the shared catalog for csv_path, reloading it only if the file changed."""
+    path = os.path.abspath(csv_path)
+    key = _stat_key(path)
+    cached = _catalogs.get(path)
+    if cached is not None and cached.stat_key == key: return cached
+
+    with _lock:
+        cached = _catalogs.get(path)
+        if cached is not None and cached.stat_key == key: return cached
+        compiled = _open_compiled(path)
+        if compiled is not None and compiled.source_stat == key:
+            catalog = ReferenceCatalog.from_compiled(compiled, path=path, stat_key=key)
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            version = hashlib.sha256(data).hexdigest()
+            if cached is not None and cached.version == version:
+                cached.stat_key = key  # touched but unchanged
+                return cached
+            if compiled is not None and compiled.version == version:
+                catalog = ReferenceCatalog.from_compiled(compiled, path=path, stat_key=key)
+            else:
+                if compiled is not None: logger.warning("%s.compiled is out of date; parsing the CSV", path)
+                catalog = ReferenceCatalog.from_bytes(data, path=path, stat_key=key)
+        _catalogs[path] = catalog
+        return catalog
+
+
+def _open_compiled(path):
+    try: return open_compiled(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("ignoring compiled catalog for %s: %s", path, e)
+        return None
@@ -0,0 +1,111 @@
+"""Result classification and body-zone mapping, per test and over whole batches.
+
+``classify_batch`` reproduces ``pipeline.get_status`` (including the 0.7x / 1.3x
+critical thresholds and "Normal" whenever a value or bound is not a number) with NumPy
+in one pass. Body zones come from a test-name -> zones table built once per name
+(``zones_for_test`` is memoised and the catalog warms it for every catalog test),
+so neither the per-report nor the batch path re-scans keyword substrings.
+"""
+from functools import lru_cache
+
+BODY_ZONE_KEYWORDS = {
+    'liver': ['liver', 'sgot', 'sgpt', 'bilirubin', 'alkaline', 'ggt'],
+    'kidney': ['kidney', 'creatinine', 'urea', 'uric', 'bun', 'protein'],
+    'heart': ['cholesterol', 'triglyceride', 'hdl', 'ldl', 'lipid', 'cardio'],
+    'blood': ['haemoglobin', 'hemoglobin', 'rbc', 'wbc', 'platelet', 'mcv', 'mch'],
+    'bone': ['calcium', 'vitamin d', 'vit d', 'phosphate', 'rheumatoid'],
+    'neuro': ['b12', 'thyroid', 'tsh', 't3', 't4']
+}
+ZONES = tuple(BODY_ZONE_KEYWORDS)
+
+# Status codes used by the batch API; index into STATUS_LABELS / CSS_CLASSES.
+NORMAL, LOW, CRIT_LOW, HIGH, CRIT_HIGH = range(5)
+STATUS_LABELS = ("Normal", "Low", "Crit Low", "High", "Crit High")
+CSS_CLASSES = ("norm", "warn", "crit", "warn", "crit")
+
+
+@lru_cache(maxsize=None)
+def zones_for_test(name):
+    """Zones (in BODY_ZONE_KEYWORDS order) whose keywords occur in the test name."""
+    name = name.lower()
+    return tuple(zone for zone, keywords in BODY_ZONE_KEYWORDS.items() if any(k in name for k in keywords))
+
+
+def build_zone_table(test_names):
+    """Precomputes ``{test_name: zones}`` for a catalog."""
+    return {name: zones_for_test(name) for name in test_names if isinstance(name, str)}
+
+
+def _zone_mask(zones):
+    mask = 0
+    for zone in zones: mask |= 1 << ZONES.index(zone)
+    return mask
+
+
+# --- BATCH API ---
+_UNPARSABLE = object()
+
+
+def _to_float(value):
+    try: return float(value)
+    except (TypeError, ValueError): return _UNPARSABLE
+
+
+def _as_float_array(values):
+    """``(floats, parsed)``: float64 array plus a mask of entries that ``float()`` accepted."""
+    import numpy as np
+    arr = np.asarray(values)
+    if arr.dtype.kind in "fiub": return arr.astype(np.float64, copy=False), np.ones(arr.shape, dtype=bool)
+    converted = [_to_float(v) for v in arr.ravel()]
+    parsed = np.fromiter((v is not _UNPARSABLE for v in converted), dtype=bool, count=arr.size)
+    floats = np.fromiter((np.nan if v is _UNPARSABLE else v for v in converted), dtype=np.float64, count=arr.size)
+    return floats.reshape(arr.shape), parsed.reshape(arr.shape)
+
+
+def classify_codes(values, lows, highs):
+    """Status code per row (NORMAL/LOW/CRIT_LOW/HIGH/CRIT_HIGH) for array-likes of equal length."""
+    import numpy as np
+    (v, ok_v), (lo, ok_lo), (hi, ok_hi) = _as_float_array(values), _as_float_array(lows), _as_float_array(highs)
+    # get_status answers "Normal" as soon as any of the three fails float(); NaNs that do
+    # parse still go through the comparisons (and compare False), exactly as there.
+    ok = ok_v & ok_lo & ok_hi
+    below = ok & (v < lo)
+    above = ok & ~below & (v > hi)
+    codes = np.full(v.shape, NORMAL, dtype=np.int8)
+    codes[below] = LOW
+    codes[below & (v < lo * 0.7)] = CRIT_LOW
+    codes[above] = HIGH
+    codes[above & (v > hi * 1.3)] = CRIT_HIGH
+    return codes
+
+
+def classify_batch(values, lows, highs):
+    """Vectorised ``get_status``: returns ``(status_labels, css_classes)`` object arrays."""
+    import numpy as np
+    codes = classify_codes(values, lows, highs)
+    return np.array(STATUS_LABELS, dtype=object)[codes], np.array(CSS_CLASSES, dtype=object)[codes]
+
+
+def classify_frame(df, value="value", low="lowvalue", high="uppervalue"):
+    """Returns a copy of df with ``status`` and ``css_class`` columns added."""
+    status, css = classify_batch(df[value].to_numpy(), df[low].to_numpy(), df[high].to_numpy())
+    out = df.copy()
+    out["status"] = status
+    out["css_class"] = css
+    return out
+
+
+def body_zone_frame(df, report="report_id", name="name", status="status", zone_table=None):
+    """One row per report, one boolean column per zone: flags from its non-Normal tests.
+
+    Same zones as ``map_body_impact`` over each report's abnormal tests.
+    """
+    import numpy as np
+    import pandas as pd
+    table = zone_table or {}
+    codes, uniques = pd.factorize(df[name])
+    masks = np.array([_zone_mask(table.get(n) or zones_for_test(n)) for n in uniques] or [0], dtype=np.int64)
+    row_masks = np.where(codes >= 0, masks[np.maximum(codes, 0)], 0)
+    row_masks[(df[status] == "Normal").to_numpy()] = 0
+    flags = pd.DataFrame({zone: (row_masks >> i) & 1 == 1 for i, zone in enumerate(ZONES)})
+    return flags.groupby(df[report].to_numpy(), sort=False).any()
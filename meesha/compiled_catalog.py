@@ -0,0 +1,239 @@
+"""Compiled, sharded form of the reference catalog.
+
+    python -m meesha.compiled_catalog test_and_values.csv [--out DIR] [--shards 16]
+
+The build parses the CSV exactly as ``ReferenceCatalog.from_bytes`` does (pandas,
+once, at build time) and writes a directory next to it (``<csv>.compiled`` by
+default): ``manifest.json`` with the test names in catalog order, the source
+CSV's hash and stat, and the column types; and one binary shard per slice of
+test names (``crc32(name) % shards``). Each shard holds its rows grouped by test,
+with the value columns stored as typed arrays and text as a string table.
+
+Loading needs neither pandas nor a full parse: shards are ``mmap``-ed read-only
+on first use (so every worker process maps the same page-cache pages) and each
+test's rows are read only when that test is first looked up.
+
+Rebuilding is incremental. Shard files are named by their content hash, so a
+rebuild only writes the shards whose rows changed, swaps the manifest
+atomically and then deletes shards nothing references any more. Processes that
+still map an old shard keep reading it until they reload.
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+
+from meesha.ranges import LazyRangeIndex
+
+FORMAT = 1
+MAGIC = b"MCAT"
+MANIFEST = "manifest.json"
+COLUMNS = ("fromage", "toage", "sextype", "lowvalue", "uppervalue")
+# pandas dtype kind -> column kind: float, int, bool or text ("s", stored as a
+# string-table index, -1 = missing). STORAGE gives the array typecode on disk.
+KINDS = {"f": "d", "i": "q", "u": "q", "b": "?", "O": "s"}
+STORAGE = {"d": "d", "q": "q", "?": "b", "s": "i"}
+
+
+def compiled_path(csv_path):
+    return os.path.abspath(csv_path) + ".compiled"
+
+
+def shard_of(name, shards):
+    return zlib.crc32(name.encode("utf-8")) % shards
+
+
+# --- READING ---
+class _Shard:
+    """One mmap-ed shard file; values are read straight from the mapping."""
+
+    def __init__(self, path, kinds):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._map)
+        magic, fmt, header_len = struct.unpack_from("<4sII", buf, 0)
+        if magic != MAGIC or fmt != FORMAT: raise ValueError(f"{path}: not a format {FORMAT} catalog shard")
+        header = json.loads(bytes(buf[12:12 + header_len]))
+        base = -(-(12 + header_len) // 8) * 8
+        self.tests = {name: (start, count) for name, start, count in header["tests"]}
+        rows = header["rows"]
+        self._columns = {}
+        for col, offset in header["columns"].items():
+            code = STORAGE[kinds[col]]
+            self._columns[col] = (kinds[col], buf[base + offset:base + offset + rows * struct.calcsize(code)].cast(code))
+        off_at, count, data_at = header["strings"]
+        self._str_offsets = buf[base + off_at:base + off_at + (count + 1) * 8].cast("q")
+        self._str_data = buf[base + data_at:]
+
+    def _string(self, i):
+        if i < 0: return float("nan")
+        return bytes(self._str_data[self._str_offsets[i]:self._str_offsets[i + 1]]).decode("utf-8")
+
+    def rows(self, name):
+        span = self.tests.get(name)
+        if span is None: return None
+        start, count = span
+        columns = [self._columns[c] for c in COLUMNS]
+        return [tuple(self._string(values[r]) if kind == "s" else bool(values[r]) if kind == "?" else values[r]
+                      for kind, values in columns)
+                for r in range(start, start + count)]
+
+
+class CompiledCatalog:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT: raise ValueError(f"{directory}: unsupported catalog format")
+        self.version = manifest["source_sha256"]
+        self.source_stat = tuple(manifest["source_stat"])
+        self.test_names = tuple(manifest["tests"])
+        self.kinds = manifest["kinds"]
+        self._files = manifest["shards"]
+        self._shards = [None] * len(self._files)
+        self._lock = threading.Lock()
+
+    def _shard(self, i):
+        shard = self._shards[i]
+        if shard is None:
+            with self._lock:
+                shard = self._shards[i]
+                if shard is None:
+                    shard = self._shards[i] = _Shard(os.path.join(self.directory, self._files[i]), self.kinds)
+        return shard
+
+    def rows_for(self, name):
+        if not isinstance(name, str): return None
+        return self._shard(shard_of(name, len(self._files))).rows(name)
+
+    def range_index(self):
+        return LazyRangeIndex(self.rows_for)
+
+
+def open_compiled(csv_path, directory=None):
+    """The compiled catalog for csv_path, or None if it has not been built."""
+    directory = directory or compiled_path(csv_path)
+    if not os.path.isfile(os.path.join(directory, MANIFEST)): return None
+    return CompiledCatalog(directory)
+
+
+# --- BUILDING ---
+def _column_kinds(df):
+    kinds = {}
+    for col in COLUMNS:
+        kind = KINDS.get(df[col].dtype.kind)
+        if kind is None: raise ValueError(f"column {col!r} has unsupported dtype {df[col].dtype}")
+        if kind == "s" and not all(isinstance(v, str) or v != v for v in df[col].tolist()):
+            raise ValueError(f"column {col!r} mixes text with other values")
+        kinds[col] = kind
+    return kinds
+
+
+def _encode_shard(groups, kinds):
+    """groups: ``[(name, rows)]``; returns the shard file's bytes."""
+    strings, string_ids = [], {}
+    columns = {col: array(STORAGE[kinds[col]]) for col in COLUMNS}
+    tests, start = [], 0
+    for name, rows in groups:
+        tests.append([name, start, len(rows)])
+        start += len(rows)
+        for row in rows:
+            for col, value in zip(COLUMNS, row):
+                if kinds[col] == "s":
+                    if not isinstance(value, str): value = -1
+                    else:
+                        if value not in string_ids: string_ids[value] = len(strings); strings.append(value)
+                        value = string_ids[value]
+                columns[col].append(value)
+
+    encoded = [v.encode("utf-8") for v in strings]
+    offsets = array("q", [0])
+    for b in encoded: offsets.append(offsets[-1] + len(b))
+
+    # Section offsets are relative to the first 8-byte boundary after the header.
+    data = bytearray()
+    placed = {}
+    for col in COLUMNS:
+        placed[col] = len(data)
+        data += columns[col].tobytes()
+        data += b"\0" * (-len(data) % 8)
+    strings_at = len(data)
+    data += offsets.tobytes() + b"".join(encoded)
+    header = json.dumps({"rows": start, "tests": tests, "columns": placed,
+                         "strings": [strings_at, len(encoded), strings_at + len(offsets) * 8]},
+                        separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    out = bytearray(struct.pack("<4sII", MAGIC, FORMAT, len(header)) + header)
+    out += b"\0" * (-len(out) % 8)
+    return bytes(out + data)
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.unlink(tmp)
+        raise
+
+
+def build(csv_path, out_dir=None, shards=16):
+    """Compiles csv_path; returns ``(shards written, shards reused)``."""
+    import pandas as pd
+
+    out_dir = out_dir or compiled_path(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    st = os.stat(csv_path)
+    df = pd.read_csv(io.BytesIO(data))
+    df.columns = df.columns.str.lower().str.strip()
+    kinds = _column_kinds(df)
+
+    grouped = {}
+    for name, *row in zip(*(df[c].tolist() for c in ("testname",) + COLUMNS)):
+        if isinstance(name, str): grouped.setdefault(name, []).append(tuple(row))
+    by_shard = [[] for _ in range(shards)]
+    for name, rows in grouped.items(): by_shard[shard_of(name, shards)].append((name, rows))
+
+    files, written = [], 0
+    for i, groups in enumerate(by_shard):
+        blob = _encode_shard(groups, kinds)
+        fname = f"shard-{i:03d}-{hashlib.sha256(blob).hexdigest()[:16]}.bin"
+        path = os.path.join(out_dir, fname)
+        if not os.path.exists(path):
+            _write_atomic(path, blob)
+            written += 1
+        files.append(fname)
+
+    manifest = {"format": FORMAT, "source": os.path.basename(csv_path),
+                "source_sha256": hashlib.sha256(data).hexdigest(), "source_stat": [st.st_mtime_ns, st.st_size],
+                "kinds": kinds, "shards": files, "tests": list(grouped)}
+    _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+    keep = set(files)
+    for fname in os.listdir(out_dir):
+        if fname.startswith("shard-") and fname not in keep: os.unlink(os.path.join(out_dir, fname))
+    return written, len(files) - written
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile the reference catalog CSV for fast, shared loading.")
+    parser.add_argument("csv", help="test_and_values.csv")
+    parser.add_argument("--out", help="output directory (default: <csv>.compiled)")
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args(argv)
+    written, reused = build(args.csv, args.out, args.shards)
+    print(f"{args.out or compiled_path(args.csv)}: {written} shard(s) written, {reused} unchanged", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
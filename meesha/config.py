@@ -0,0 +1,86 @@
+"""Runtime settings, overridable through ``MEESHA_*`` environment variables."""
+import os
+import sys
+
+
+def env_int(name, default):
+    try: return int(os.environ.get(name, default))
+    except ValueError: return default
+
+
+def env_float(name, default):
+    try: return float(os.environ.get(name, default))
+    except ValueError: return default
+
+
+def env_str(name, default=None):
+    return os.environ.get(name) or default
+
+
+def user_data_dir(app="meesha"):
+    """The per-user application data directory (persistent, unlike the temp dir)."""
+    if os.name == "nt": base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+    elif sys.platform == "darwin": base = os.path.expanduser("~/Library/Application Support")
+    else: base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, app)
+
+
+# Job payloads/results and patient history live here (private to the user running the app).
+DATA_DIR = env_str("MEESHA_DATA_DIR", user_data_dir())
+
+
+# --- RESULT CACHE ---
+RESULT_CACHE_MAX_MB = env_int("MEESHA_RESULT_CACHE_MAX_MB", 256)
+RESULT_CACHE_MAX_ENTRIES = env_int("MEESHA_RESULT_CACHE_MAX_ENTRIES", 500)
+RESULT_CACHE_DIR = env_str("MEESHA_RESULT_CACHE_DIR")  # unset = memory only
+RESULT_CACHE_DISK_MAX_MB = env_int("MEESHA_RESULT_CACHE_DISK_MAX_MB", 2048)
+
+# --- SUMMARY RENDERING ---
+RENDER_BACKEND = env_str("MEESHA_RENDER_BACKEND", "wkhtmltopdf")  # "overlay" draws in-process, "stub" for local testing
+RENDER_POOL_SIZE = env_int("MEESHA_RENDER_POOL_SIZE", 2)
+RENDER_TIMEOUT = env_int("MEESHA_RENDER_TIMEOUT", 60)  # seconds per job
+RENDER_START_METHOD = env_str("MEESHA_RENDER_START_METHOD")  # multiprocessing default if unset
+ALLOW_REMOTE_ASSETS = env_str("MEESHA_ALLOW_REMOTE_ASSETS") == "1"  # render hosts are offline by default
+
+# --- TEMPLATES ---
+SUMMARY_TEMPLATE_VERSION = env_str("MEESHA_SUMMARY_TEMPLATE", "v1")
+TEMPLATE_CACHE_DIR = env_str("MEESHA_TEMPLATE_CACHE_DIR")  # Jinja bytecode cache shared across processes
+
+# --- EXTRACTION ---
+MAX_PAGES = env_int("MEESHA_MAX_PAGES", 0)  # 0 = read every page
+LAYOUT_PROFILE_DIR = env_str("MEESHA_LAYOUT_PROFILE_DIR")  # *.json lab layout profiles, see meesha/profiles.py
+# Processes one large document is split across; 0 = the cores the app, service or batch is not
+# using for other documents (or, for direct callers, the cores idle by load average).
+EXTRACT_WORKERS = env_int("MEESHA_EXTRACT_WORKERS", 0)
+EXTRACT_PARALLEL_MIN_PAGES = env_int("MEESHA_EXTRACT_PARALLEL_MIN_PAGES", 48)  # smaller documents stay in-process
+EXTRACT_PARALLEL_MIN_BYTES = env_int("MEESHA_EXTRACT_PARALLEL_MIN_BYTES", 32 * 1024)  # below this, pages are not counted
+EXTRACT_POOL_IDLE = env_float("MEESHA_EXTRACT_POOL_IDLE", 60.0)  # seconds an unused page-extraction pool is kept
+
+# --- INSTRUMENTATION (all off unless MEESHA_PROFILE=1) ---
+PROFILE = env_str("MEESHA_PROFILE") == "1"
+PROFILE_EXPORTERS = env_str("MEESHA_PROFILE_EXPORTERS", "log,panel")  # log, prometheus, panel
+PROFILE_MEMORY_SAMPLE = env_float("MEESHA_PROFILE_MEMORY_SAMPLE", 0.1)  # share of requests traced with tracemalloc
+PROFILE_CPROFILE_DIR = env_str("MEESHA_PROFILE_CPROFILE_DIR")  # one .prof dump per request when set; overlapping requests are not profiled
+PROMETHEUS_FILE = env_str("MEESHA_PROMETHEUS_FILE", "meesha_stages.prom")
+
+# --- BACKGROUND JOBS ---
+JOB_DB = env_str("MEESHA_JOB_DB", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_WORKERS = env_int("MEESHA_JOB_WORKERS", 4)  # threads driving jobs (render/merge wait on I/O)
+JOB_CPU_WORKERS = env_int("MEESHA_JOB_CPU_WORKERS", os.cpu_count() or 1)  # processes for extraction
+JOB_TIMEOUT = env_int("MEESHA_JOB_TIMEOUT", 300)  # seconds per job
+JOB_RETENTION_HOURS = env_int("MEESHA_JOB_RETENTION_HOURS", 24)  # finished jobs (and their PDFs) kept this long
+JOB_PURGE_INTERVAL = env_int("MEESHA_JOB_PURGE_INTERVAL", 3600)  # seconds between purges by the workers
+
+# --- PATIENT HISTORY ---
+HISTORY_ENABLED = env_str("MEESHA_HISTORY", "1") == "1"
+HISTORY_DB = env_str("MEESHA_HISTORY_DB", os.path.join(DATA_DIR, "history.sqlite3"))
+HISTORY_VISITS = env_int("MEESHA_HISTORY_VISITS", 5)  # previous visits shown per test
+
+# --- HTTP SERVICE (python -m meesha.service) ---
+SERVICE_HOST = env_str("MEESHA_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = env_int("MEESHA_SERVICE_PORT", 8080)
+SERVICE_WORKERS = env_int("MEESHA_SERVICE_WORKERS", os.cpu_count() or 1)  # processes for extraction/rendering
+SERVICE_MAX_PENDING = env_int("MEESHA_SERVICE_MAX_PENDING", 32)  # uploads being read + distinct analyses in flight before 429
+SERVICE_MAX_UPLOAD_MB = env_int("MEESHA_SERVICE_MAX_UPLOAD_MB", 50)
+SERVICE_TIMEOUT = env_int("MEESHA_SERVICE_TIMEOUT", 300)  # seconds a request waits for its analysis
+SERVICE_IDLE_TIMEOUT = env_int("MEESHA_SERVICE_IDLE_TIMEOUT", 30)  # seconds per read from a client
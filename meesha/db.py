@@ -0,0 +1,61 @@
+"""Local SQLite files (job queue, patient history).
+
+``ThreadConnections`` gives each thread its own autocommit connection, handed
+out as ``with conns() as db:``; an exception inside the block rolls back any
+transaction the block opened. Both databases hold patient PDFs or results, so
+each is created readable by its owner only (0600, in a 0700 directory when we
+create it); SQLite gives its ``-wal``/``-shm`` files the database file's mode.
+"""
+import os
+import sqlite3
+import threading
+
+
+def private_file(path):
+    """Creates path (and missing parent directories) accessible by the owner only."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory): os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    os.close(fd)
+    if os.name != "nt": os.chmod(path, 0o600)  # files left by older versions were world-readable
+
+
+def connect(path):
+    """A WAL-mode autocommit connection to the private database at path."""
+    private_file(path)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+class ThreadConnections:
+    """Per-thread connections to one database file."""
+
+    def __init__(self, path, row_factory=None, pragmas=()):
+        self.path = path
+        self.row_factory = row_factory
+        self.pragmas = pragmas
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.path)
+            for pragma in self.pragmas: conn.execute(f"PRAGMA {pragma}")
+            if self.row_factory is not None: conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return _Tx(conn)
+
+
+class _Tx:
+    """``with`` wrapper handing out the thread's connection (autocommit mode)."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None and self.conn.in_transaction: self.conn.execute("ROLLBACK")
+        return False
@@ -0,0 +1,235 @@
+"""Page-at-a-time PDF text extraction.
+
+``iter_page_texts`` yields one page's text at a time so callers can stop as soon
+as they have what they need, and picks the backend per page: pdfplumber first,
+pypdf for pages pdfplumber cannot read or returns no text for.
+
+A source is a file path or the PDF bytes themselves (``bytes``/``bytearray``/
+``memoryview``); bytes are read through ``BytesIO`` so no temp file is involved.
+pdfplumber and pypdf are imported on first use, not with this module.
+
+Large documents (at least ``MEESHA_EXTRACT_PARALLEL_MIN_BYTES`` and
+``MEESHA_EXTRACT_PARALLEL_MIN_PAGES``) are split into contiguous page ranges
+that a per-process pool extracts concurrently, at most ``workers`` at a time;
+each worker opens the document itself (uploads are spilled to one temp file for
+that) and parses only its own pages. Chunks are yielded back strictly in page
+order, so callers see exactly the sequential output and can still stop early,
+which cancels the chunks not yet started. The pool's processes are spawned as
+chunks need them and the pool is shut down once it has been idle for
+``MEESHA_EXTRACT_POOL_IDLE`` seconds, so job, service and batch workers that
+each split a document do not keep a machine's worth of processes apiece.
+"""
+import io
+import logging
+import os
+import tempfile
+import threading
+
+from meesha import config
+
+logger = logging.getLogger(__name__)
+
+MIN_CHUNK_PAGES = 8
+CHUNKS_PER_WORKER = 2  # smaller chunks even out slow pages and let early stops skip more work
+
+
+def open_source(source):
+    """Returns something pdfplumber/pypdf can open: the path itself or a fresh in-memory stream."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # BytesIO shares an immutable bytes buffer until written to, so this does not copy.
+        return io.BytesIO(source if isinstance(source, bytes) else bytes(source))
+    return source
+
+
+class _PypdfPages:
+    """Lazily opened pypdf fallback, shared by all pages of one document."""
+
+    def __init__(self, source):
+        self.source = source
+        self._reader = None
+
+    def _open(self):
+        if self._reader is None:
+            from pypdf import PdfReader
+            self._reader = PdfReader(open_source(self.source))
+        return self._reader
+
+    def text(self, index):
+        try:
+            return self._open().pages[index].extract_text() or ""
+        except Exception as e:
+            logger.debug("pypdf could not read page %d: %s", index + 1, e)
+            return ""
+
+    def count(self):
+        try:
+            return len(self._open().pages)
+        except Exception: return 0
+
+
+def _page_texts(source, start=0, stop=None):
+    """Yields ``(page_index, text)`` for pages ``start`` to ``stop - 1`` (None = to the end) that have text."""
+    import pdfplumber
+    fallback = _PypdfPages(source)
+    try:
+        # Only the requested pages get pdfplumber Page objects.
+        pdf = pdfplumber.open(open_source(source), pages=range(start + 1, stop + 1) if stop is not None else None)
+    except Exception as e:
+        logger.debug("pdfplumber could not open document: %s", e)
+        pdf = None
+
+    if pdf is None:
+        total = fallback.count()
+        for i in range(start, min(total, stop) if stop is not None else total):
+            txt = fallback.text(i)
+            if txt: yield i, txt
+        return
+
+    with pdf:
+        for page in pdf.pages:
+            if page.page_number <= start: continue
+            i = page.page_number - 1
+            try: txt = page.extract_text()
+            except Exception: txt = None
+            finally:
+                close = getattr(page, "close", None)  # frees pdfplumber's per-page object cache
+                if close: close()
+            if not txt or not txt.strip(): txt = fallback.text(i)
+            if txt: yield i, txt
+
+
+def _extract_range(source, start, stop):
+    """Pool worker: the ``(page_index, text)`` list of one page range."""
+    return list(_page_texts(source, start, stop))
+
+
+def extraction_workers():
+    """Processes one document may use by default: the cores not already busy (1 = sequential).
+
+    Busy is the one-minute load average (this process's own core included), so
+    a lone large upload gets the idle machine and a saturated batch or job pool
+    stays sequential. Callers that know their share pass ``workers`` instead.
+    """
+    if config.EXTRACT_WORKERS > 0: return config.EXTRACT_WORKERS
+    cores = os.cpu_count() or 1
+    try: load = os.getloadavg()[0]
+    except (AttributeError, OSError): return cores  # no load average (Windows)
+    return max(1, min(cores, round(cores - load) + 1))
+
+
+def extraction_share(busy):
+    """Processes one document may use while ``busy`` other documents are being analysed."""
+    if config.EXTRACT_WORKERS > 0: return config.EXTRACT_WORKERS
+    return max(1, (os.cpu_count() or 1) - busy)
+
+
+def _source_size(source):
+    if isinstance(source, (bytes, bytearray, memoryview)): return len(source)
+    try: return os.path.getsize(source)
+    except (OSError, TypeError): return 0
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_users = 0  # documents being extracted with _pool
+_pool_exit = None  # the pool's exit-time shutdown (a multiprocessing Finalize)
+_idle_timer = None
+
+
+def _acquire_pool():
+    global _pool, _pool_users, _pool_exit, _idle_timer
+    with _pool_lock:
+        if _idle_timer is not None: _idle_timer.cancel(); _idle_timer = None
+        if _pool is None:
+            import multiprocessing as mp
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing.util import Finalize
+            # Spawned, not forked: the app, service and job processes are threaded. Spawned
+            # workers start only as chunks need them, so each document's share bounds the pool.
+            _pool = ProcessPoolExecutor(max_workers=extraction_share(0), mp_context=mp.get_context("spawn"))
+            # Job/service/batch workers exit through multiprocessing, which joins their children
+            # before any atexit hook, so shut down there; ahead of the pool's own queues (priority 10).
+            _pool_exit = Finalize(_pool, _pool.shutdown, kwargs={"cancel_futures": True}, exitpriority=100)
+        _pool_users += 1
+        return _pool
+
+
+def _release_pool():
+    global _pool_users, _idle_timer
+    with _pool_lock:
+        _pool_users -= 1
+        if _pool_users == 0 and _pool is not None:
+            _idle_timer = threading.Timer(config.EXTRACT_POOL_IDLE, _close_idle_pool)
+            _idle_timer.daemon = True
+            _idle_timer.start()
+
+
+def _close_idle_pool():
+    global _pool, _pool_exit, _idle_timer
+    with _pool_lock:
+        if _pool_users or _pool is None: return
+        shutdown, _pool, _pool_exit, _idle_timer = _pool_exit, None, None, None
+    shutdown()  # runs the exit-time shutdown now, once
+
+
+def _reset_pool(broken):
+    global _pool, _pool_exit
+    with _pool_lock:
+        if _pool is broken:
+            _pool_exit.cancel()
+            _pool, _pool_exit = None, None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_parallel(path, total, workers):
+    from collections import deque
+    from concurrent.futures.process import BrokenProcessPool
+    size = max(MIN_CHUNK_PAGES, -(-total // (workers * CHUNKS_PER_WORKER)))
+    chunks = deque((start, min(start + size, total)) for start in range(0, total, size))
+    pool = _acquire_pool()
+    pending = deque()  # (start, stop, future), at most ``workers`` in flight
+    resume = 0  # first page not yielded yet
+    try:
+        while chunks or pending:
+            while chunks and len(pending) < workers:
+                start, stop = chunks.popleft()
+                pending.append((start, stop, pool.submit(_extract_range, path, start, stop)))
+            start, stop, fut = pending.popleft()
+            yield from fut.result()
+            resume = stop
+    except BrokenProcessPool:
+        logger.warning("page extraction pool broke; reading the rest of the document in-process")
+        _reset_pool(pool)
+        yield from _page_texts(path, resume, total)
+    finally:
+        for _, _, fut in pending: fut.cancel()
+        _release_pool()
+
+
+def iter_page_texts(source, max_pages=None, workers=None):
+    """Yields ``(page_index, text)`` for every page with text, up to max_pages pages.
+
+    Large documents are extracted by up to ``workers`` processes (default
+    ``extraction_workers()``); the output is the same either way.
+    """
+    workers = workers or extraction_workers()
+    # Counting pages parses the whole file, so only when a split is possible at all.
+    if (workers > 1 and (not max_pages or max_pages >= config.EXTRACT_PARALLEL_MIN_PAGES)
+            and _source_size(source) >= config.EXTRACT_PARALLEL_MIN_BYTES):
+        total = _PypdfPages(source).count()
+        if max_pages: total = min(total, max_pages)
+        if total >= config.EXTRACT_PARALLEL_MIN_PAGES:
+            if isinstance(source, (str, os.PathLike)):
+                yield from _iter_parallel(source, total, workers)
+                return
+            # Workers open the document by path, so uploads are written out once.
+            fd, path = tempfile.mkstemp(suffix=".pdf")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(source)
+                yield from _iter_parallel(path, total, workers)
+            finally:
+                try: os.unlink(path)
+                except OSError: pass  # still open in a worker on Windows; the temp dir is cleaned eventually
+            return
+    yield from _page_texts(source, 0, max_pages or None)
@@ -0,0 +1,95 @@
+"""Header fields (patient name, ID, age/gender, doctor, date) from report text.
+
+The five field patterns are compiled once at import. ``extract_header`` finds
+every field in a single left-to-right pass of one combined pattern, stopping as
+soon as all five are known; that pass only covers the header block (the first
+``HEADER_BLOCK_CHARS`` of the text), and fields still missing after it are
+searched individually in the rest of the text. Results are the same as a
+separate ``re.search`` per field (with these patterns) over the whole text.
+
+The patterns keep the original matching rules but use possessive runs, so
+inputs such as long runs of spaces after "Id" or long digit strings stay linear
+instead of quadratic (``benchmarks/check_header_patterns.py`` guards this). One
+rule changed: the "Years"-style word between the age and the ``/`` is limited
+to 64 characters, where the original pattern took a word of any length. A
+longer word (no real header has one) now gives no age/gender match, or a later
+one, instead of the age before it.
+"""
+import re
+
+HEADER_BLOCK_CHARS = 4000
+
+_RUN = r"[A-Za-z\s\.]"
+_LEADS = {
+    "patient_name": r"(?:Patient\s*Name|Name)\s*[:\-\.]?\s*(?:Mrs\.|Mr\.|Ms\.)?\s*",
+    "patient_id": r"(?:Patient\s*Id|Id|ID|Treatment\s*id)\s*+(?:[:\-\.]\s*+)?",
+    "doctor": r"(?:Ref\.?\s*By|Referred\s*By|Dr)\s*+(?:[:\-\.]\s*+)?Dr\.?",
+}
+
+HEADER_PATTERNS = {
+    "patient_name": re.compile(_LEADS["patient_name"] + rf"({_RUN}+)", re.IGNORECASE),
+    "patient_id": re.compile(_LEADS["patient_id"] + r"(\d+)", re.IGNORECASE),
+    "age_gender": re.compile(r"(\d{1,3}+)\s*+\w{0,64}+\s*+[\/\-]\s*+(Male|Female|M|F)", re.IGNORECASE),
+    "doctor": re.compile(r"(?:Ref\.?\s*By|Referred\s*By|Dr)\s*+(?:[:\-\.]\s*+)?(Dr\.?" + _RUN + r"+)", re.IGNORECASE),
+    "date": re.compile(r"(?:Registered|Reported|Date)\s*+(?:On\s*+)?(?:[:\-\.]\s*+)?(\d{2}[\/\-\.]\d{2}[\/\-\.]\d{2,4})", re.IGNORECASE),
+}
+HEADER_FIELDS = tuple(HEADER_PATTERNS)
+
+# The combined scan only has to find where each field matches; the value is then
+# read with the field's own pattern. Open-ended values are cut to their first
+# character (a pattern ending in X+ matches wherever the same pattern ending in X
+# does), so a hit costs the same however long the value runs. The alternatives are
+# zero-width so overlapping fields are all seen, and no two fields can match at the
+# same offset (their leading keywords/digits differ): each first hit is the
+# leftmost match of its field.
+_DETECT = {
+    "patient_name": _LEADS["patient_name"] + _RUN,
+    "patient_id": _LEADS["patient_id"] + r"\d",
+    "age_gender": HEADER_PATTERNS["age_gender"].pattern,
+    "doctor": _LEADS["doctor"] + _RUN,
+    "date": HEADER_PATTERNS["date"].pattern,
+}
+COMBINED_PATTERN = re.compile("|".join(f"(?P<{f}>(?={_DETECT[f]}))" for f in HEADER_FIELDS), re.IGNORECASE)
+
+
+def _value(field, m):
+    if field == "patient_name": return m.group(0).replace("Patient Name", "").replace(":", "").strip()
+    if field == "age_gender": return f"{m.group(1)} Y / {m.group(2)}"
+    if field == "doctor": return m.group(1).strip()
+    return m.group(1)
+
+
+def find_fields(text, fields=HEADER_FIELDS, start=0, stop=None):
+    """``{field: match}`` for the first match of each wanted field starting in ``text[start:stop]``."""
+    wanted = set(fields)
+    found = {}
+    for hit in COMBINED_PATTERN.finditer(text, start):
+        if stop is not None and hit.start() >= stop: break
+        field = hit.lastgroup
+        if field in wanted and field not in found:
+            found[field] = HEADER_PATTERNS[field].match(text, hit.start())
+            if len(found) == len(wanted): break
+    return found
+
+
+def extract_header(full_text, header_chars=HEADER_BLOCK_CHARS):
+    info = {"patient_name": "Unknown", "patient_id": "Unknown", "age_gender": "Unknown", "doctor": "Unknown", "date": "Unknown"}
+    found = find_fields(full_text, stop=header_chars)
+    for field in HEADER_FIELDS:
+        m = found.get(field)
+        if m is None and header_chars is not None:
+            m = HEADER_PATTERNS[field].search(full_text, header_chars)
+        if m: info[field] = _value(field, m)
+    return info
+
+
+def field_value(field, text):
+    """One field from a small text region (a layout profile's header box).
+
+    Uses the field's pattern when the region still carries its label, otherwise
+    the region's text itself; None when the region is empty.
+    """
+    m = HEADER_PATTERNS[field].search(text)
+    if m: return _value(field, m)
+    text = " ".join(text.split())
+    return text or None
@@ -0,0 +1,235 @@
+"""Longitudinal patient history in a local SQLite store.
+
+Every analysed report can be recorded; each result row is keyed by
+``(patient_id, test, report_date, report_id)`` in a ``WITHOUT ROWID`` table, so
+"the last N values of this test for this patient before this date" is one
+descent of the clustered primary key whatever the table size. Each row also
+keeps the previous visit's value and the delta to it. These are maintained
+incrementally on insert: a new row reads its predecessor, and its successor (if
+an older report is backfilled later) is re-pointed at it, so trend queries
+never re-scan a patient's history.
+
+The app, the HTTP service and the batch CLI record every report they finish
+(``record_report``), after the summary has been produced, so failed or cancelled
+reports leave no rows. Batch PDFs are rendered without trends: files in a batch
+are processed in parallel and in no particular date order.
+
+Backfill historical PDFs with
+``python -m meesha.history backfill INPUT [--catalog CSV] [--workers N]``.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date
+
+from meesha import config, db as sqlite_db
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    source_sha256 TEXT UNIQUE,
+    patient_name TEXT,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_patient ON reports (patient_id, report_date);
+CREATE TABLE IF NOT EXISTS results (
+    patient_id TEXT NOT NULL,
+    test TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    report_id INTEGER NOT NULL,
+    value REAL NOT NULL,
+    status TEXT NOT NULL,
+    ref_range TEXT,
+    prev_value REAL,
+    delta REAL,
+    PRIMARY KEY (patient_id, test, report_date, report_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_test_date ON results (test, report_date);
+"""
+
+DATE_PATTERN = re.compile(r"(\d{2})[\/\-\.](\d{2})[\/\-\.](\d{4}|\d{2})")
+
+
+def iso_date(text):
+    """``dd/mm/yyyy``-style report dates (as the header extractor returns them) to ISO, or None."""
+    m = DATE_PATTERN.fullmatch((text or "").strip())
+    if not m: return None
+    day, month, year = (int(g) for g in m.groups())
+    if year < 100: year += 2000
+    try: return date(year, month, day).isoformat()
+    except ValueError: return None
+
+
+def report_key(info):
+    """``(patient_id, iso_date)`` for a report, or None if it cannot be linked to a patient."""
+    patient_id = info.get("patient_id")
+    if not patient_id or patient_id == "Unknown": return None
+    day = iso_date(info.get("date")) or iso_date(info.get("report_date")) or date.today().isoformat()
+    return patient_id, day
+
+
+class HistoryStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = sqlite_db.ThreadConnections(db_path, pragmas=("synchronous=NORMAL",))
+        with self._db() as db:
+            db.executescript(SCHEMA)
+
+    def record(self, info, results, source_sha256=None):
+        """Stores one report's results; returns its id, or None if unlinkable or already recorded."""
+        key = report_key(info)
+        if key is None: return None
+        patient_id, day = key
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            cur = db.execute("INSERT OR IGNORE INTO reports (patient_id, report_date, source_sha256, patient_name, "
+                             "recorded) VALUES (?, ?, ?, ?, ?)",
+                             (patient_id, day, source_sha256, info.get("patient_name"), time.time()))
+            if cur.rowcount == 0:
+                db.execute("COMMIT")
+                return None
+            report_id = cur.lastrowid
+            for r in results: self._insert(db, patient_id, day, report_id, r)
+            db.execute("COMMIT")
+        return report_id
+
+    @staticmethod
+    def _insert(db, patient_id, day, report_id, r):
+        prev = db.execute("SELECT value FROM results WHERE patient_id=? AND test=? AND (report_date, report_id) < (?, ?) "
+                          "ORDER BY report_date DESC, report_id DESC LIMIT 1",
+                          (patient_id, r["name"], day, report_id)).fetchone()
+        prev_value = prev[0] if prev else None
+        db.execute("INSERT OR REPLACE INTO results (patient_id, test, report_date, report_id, value, status, ref_range, "
+                   "prev_value, delta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                   (patient_id, r["name"], day, report_id, r["value"], r["status"], r.get("range"), prev_value,
+                    r["value"] - prev_value if prev_value is not None else None))
+        # A backfilled older report becomes the predecessor of the next visit.
+        db.execute("UPDATE results SET prev_value=?, delta=value-? WHERE (patient_id, test, report_date, report_id) = "
+                   "(SELECT patient_id, test, report_date, report_id FROM results WHERE patient_id=? AND test=? AND "
+                   "(report_date, report_id) > (?, ?) ORDER BY report_date, report_id LIMIT 1)",
+                   (r["value"], r["value"], patient_id, r["name"], day, report_id))
+
+    def previous(self, patient_id, test, before, limit=None):
+        """``[(iso_date, value, status)]`` for the last ``limit`` visits strictly before ``before``, newest first."""
+        with self._db() as db:
+            return db.execute("SELECT report_date, value, status FROM results WHERE patient_id=? AND test=? "
+                              "AND report_date < ? ORDER BY report_date DESC, report_id DESC LIMIT ?",
+                              (patient_id, test, before, limit or config.HISTORY_VISITS)).fetchall()
+
+    def trends(self, info, results, limit=None):
+        """``{test_name: trend}`` versus this patient's earlier visits (tests with no history are left out)."""
+        key = report_key(info)
+        if key is None: return {}
+        patient_id, day = key
+        out = {}
+        for r in results:
+            rows = self.previous(patient_id, r["name"], day, limit)
+            if not rows: continue
+            delta = r["value"] - rows[0][1]
+            out[r["name"]] = {
+                "previous": [{"date": d, "value": v, "status": s} for d, v, s in rows],
+                "previous_date": rows[0][0],
+                "delta": delta,
+                "arrow": "▲" if delta > 0 else "▼" if delta < 0 else "=",
+            }
+        return out
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    """Returns the process-wide store, or None when ``MEESHA_HISTORY=0``."""
+    global _store
+    if not config.HISTORY_ENABLED: return None
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore(config.HISTORY_DB)
+        return _store
+
+
+def report_trends(info, results):
+    """Trends for a freshly analysed report (``{}`` when history is off); history errors never fail a report."""
+    store = get_history_store()
+    if store is None: return {}
+    try:
+        return store.trends(info, results)
+    except sqlite3.Error as e:
+        logger.warning("patient history unavailable: %s", e)
+        return {}
+
+
+def record_report(info, results, source_bytes=None, source_sha256=None):
+    """Records a report once it has been delivered; failed or cancelled reports are never recorded."""
+    store = get_history_store()
+    if store is None: return None
+    if source_sha256 is None and source_bytes is not None: source_sha256 = hashlib.sha256(source_bytes).hexdigest()
+    try:
+        return store.record(info, results, source_sha256)
+    except sqlite3.Error as e:
+        logger.warning("could not record patient history: %s", e)
+        return None
+
+
+# --- BACKFILL ---
+def _analyze_file(path, csv_path):
+    from meesha.pipeline import analyze_report
+    with open(path, "rb") as f:
+        data = f.read()
+    info, results, _ = analyze_report(data, csv_path)
+    return info, results, hashlib.sha256(data).hexdigest()
+
+
+def backfill(paths, csv_path, store, workers=None):
+    """Analyses PDFs in a process pool and records them; returns ``(recorded, skipped, failed)``."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    recorded = skipped = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_analyze_file, p, csv_path): p for p in paths}
+        for fut in as_completed(futures):
+            try:
+                info, results, sha = fut.result()
+            except Exception as e:
+                logger.error("%s: %s", futures[fut], e)
+                failed += 1
+                continue
+            if store.record(info, results, sha) is None: skipped += 1
+            else: recorded += 1
+    return recorded, skipped, failed
+
+
+def main(argv=None):
+    import argparse
+    from meesha.batch import REPO_DIR, collect_inputs
+
+    parser = argparse.ArgumentParser(description="Patient history store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bf = sub.add_parser("backfill", help="analyse historical PDFs and record their results")
+    bf.add_argument("input", help="directory of PDFs or a glob pattern")
+    bf.add_argument("--catalog", default=os.path.join(REPO_DIR, "test_and_values.csv"))
+    bf.add_argument("--workers", type=int, default=os.cpu_count())
+    bf.add_argument("--db", default=config.HISTORY_DB)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    paths = collect_inputs(args.input)
+    start = time.perf_counter()
+    recorded, skipped, failed = backfill(paths, args.catalog, HistoryStore(args.db), args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{recorded} recorded, {skipped} skipped (unlinkable or already recorded), {failed} failed "
+          f"in {elapsed:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
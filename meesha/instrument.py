@@ -0,0 +1,265 @@
+"""Opt-in per-stage timing and memory instrumentation.
+
+    with trace("upload") as t:          # one per report/request
+        with span("extraction"): ...    # any number, nested or repeated
+
+Spans record wall time, the CPU time of the thread running them (so jobs
+traced concurrently on other threads are not counted) and, for a sampled share
+of requests, the tracemalloc peak; repeated spans with the same name are
+summed. When a trace ends it is handed to the configured exporters (log line,
+Prometheus textfile, in-app debug panel) and, if ``MEESHA_PROFILE_CPROFILE_DIR``
+is set, a cProfile dump is written for it (one trace is profiled at a time;
+traces that overlap it are not). Work shipped to a process pool runs under
+``run_captured``, and ``merge_stages`` adds the spans it recorded to the
+caller's trace. With ``MEESHA_PROFILE`` unset, ``span``/``trace`` return a
+shared no-op context manager.
+"""
+import contextlib
+import contextvars
+import cProfile
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+
+from meesha import config
+
+logger = logging.getLogger(__name__)
+
+ENABLED = config.PROFILE
+_NULL = contextlib.nullcontext()
+_current = contextvars.ContextVar("meesha_trace", default=None)
+_profiling = threading.Lock()  # held by the one trace being profiled
+_memory_lock = threading.Lock()
+_memory_traces = 0  # sampled traces running; tracemalloc stops when the last one ends
+_memory_started = False
+
+
+class StageStats:
+    __slots__ = ("calls", "wall", "cpu", "peak_bytes")
+
+    def __init__(self):
+        self.calls = 0; self.wall = 0.0; self.cpu = 0.0; self.peak_bytes = None
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name, request_id=None, memory=False):
+        self.name = name
+        self.request_id = request_id or uuid.uuid4().hex[:12]
+        self.memory = memory
+        self.stages = {}
+        self.wall = self.cpu = 0.0
+        self.worker_cpu = 0.0  # CPU merged from pool processes, added to the trace total
+
+    def add(self, stage, wall, cpu, peak, calls=1):
+        stats = self.stages.get(stage)
+        if stats is None: stats = self.stages[stage] = StageStats()
+        stats.calls += calls; stats.wall += wall; stats.cpu += cpu
+        if peak is not None: stats.peak_bytes = max(stats.peak_bytes or 0, peak)
+
+    def as_dict(self):
+        return {"name": self.name, "request_id": self.request_id, "wall_ms": round(self.wall * 1e3, 3),
+                "cpu_ms": round(self.cpu * 1e3, 3),
+                "stages": {k: {"calls": s.calls, "wall_ms": round(s.wall * 1e3, 3), "cpu_ms": round(s.cpu * 1e3, 3),
+                               "peak_kb": round(s.peak_bytes / 1024, 1) if s.peak_bytes is not None else None}
+                           for k, s in self.stages.items()}}
+
+
+class _Span:
+    __slots__ = ("name", "trace", "t0", "c0")
+
+    def __init__(self, name, trace):
+        self.name = name; self.trace = trace
+
+    def __enter__(self):
+        if self.trace.memory: tracemalloc.reset_peak()
+        self.t0 = time.perf_counter(); self.c0 = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.t0; cpu = time.thread_time() - self.c0
+        # tracemalloc is process-wide: peaks are approximate when requests overlap.
+        peak = tracemalloc.get_traced_memory()[1] if self.trace.memory else None
+        self.trace.add(self.name, wall, cpu, peak)
+        return False
+
+
+def span(name):
+    """Times a pipeline stage inside the current trace (no-op when disabled or untraced)."""
+    if not ENABLED: return _NULL
+    current = _current.get()
+    if current is None: return _NULL
+    return _Span(name, current)
+
+
+def _start_memory():
+    global _memory_traces, _memory_started
+    with _memory_lock:
+        if _memory_traces == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(); _memory_started = True
+        _memory_traces += 1
+
+
+def _stop_memory():
+    global _memory_traces, _memory_started
+    with _memory_lock:
+        _memory_traces -= 1
+        if _memory_traces == 0 and _memory_started:
+            tracemalloc.stop(); _memory_started = False
+
+
+def _start_profiler():
+    """A running cProfile.Profile, or None if another trace is being profiled."""
+    if not config.PROFILE_CPROFILE_DIR or not _profiling.acquire(blocking=False): return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:  # another profiler (e.g. a debugger or coverage) is active
+        _profiling.release()
+        logger.debug("cProfile not started: %s", e)
+        return None
+    return profiler
+
+
+@contextlib.contextmanager
+def _trace(name, request_id):
+    memory = random.random() < config.PROFILE_MEMORY_SAMPLE
+    if memory: _start_memory()
+    current = Trace(name, request_id, memory)
+    token = _current.set(current)
+    t0 = time.perf_counter(); c0 = time.thread_time()
+    profiler = _start_profiler()
+    try:
+        yield current
+    finally:
+        if profiler:
+            profiler.disable(); _profiling.release()
+        current.wall = time.perf_counter() - t0; current.cpu = time.thread_time() - c0 + current.worker_cpu
+        _current.reset(token)
+        if memory: _stop_memory()
+        if profiler: _dump_profile(profiler, current)
+        export(current)
+
+
+def trace(name, request_id=None):
+    """Starts a trace for one request; yields the Trace (or None when disabled)."""
+    if not ENABLED: return _NULL
+    return _trace(name, request_id)
+
+
+def run_captured(fn, *args):
+    """Runs ``fn(*args)`` in a process pool worker; returns ``(result, stages)`` for ``merge_stages``.
+
+    The spans are collected in a private trace that is not exported (stages is
+    None when instrumentation is disabled).
+    """
+    if not ENABLED: return fn(*args), None
+    current = Trace("worker")
+    token = _current.set(current)
+    try:
+        result = fn(*args)
+    finally:
+        _current.reset(token)
+    return result, {k: (s.calls, s.wall, s.cpu, s.peak_bytes) for k, s in current.stages.items()}
+
+
+def merge_stages(stages):
+    """Adds spans recorded by ``run_captured`` in another process to the current trace."""
+    current = _current.get() if ENABLED else None
+    if current is None or not stages: return
+    for stage, (calls, wall, cpu, peak) in stages.items():
+        current.add(stage, wall, cpu, peak, calls)
+        current.worker_cpu += cpu
+
+
+def _dump_profile(profiler, current):
+    try:
+        os.makedirs(config.PROFILE_CPROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(config.PROFILE_CPROFILE_DIR, f"{current.name}-{current.request_id}.prof"))
+    except OSError as e:
+        logger.warning("could not write cProfile dump: %s", e)
+
+
+# --- EXPORTERS ---
+class LogExporter:
+    """One log line per trace."""
+
+    def export(self, current):
+        parts = " ".join(f"{k}={s.wall * 1e3:.1f}ms" for k, s in current.stages.items())
+        logger.info("trace %s id=%s total=%.1fms cpu=%.1fms %s", current.name, current.request_id,
+                    current.wall * 1e3, current.cpu * 1e3, parts)
+
+
+class PrometheusTextExporter:
+    """Cumulative per-stage counters rewritten as a node_exporter textfile."""
+
+    def __init__(self, path):
+        self.path = path
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def export(self, current):
+        with self._lock:
+            for stage, s in list(current.stages.items()) + [("total", current)]:
+                count, wall, cpu = self._totals.get(stage, (0, 0.0, 0.0))
+                self._totals[stage] = (count + 1, wall + s.wall, cpu + s.cpu)
+            lines = ["# HELP meesha_stage_seconds_total Wall time spent per pipeline stage.",
+                     "# TYPE meesha_stage_seconds_total counter"]
+            lines += [f'meesha_stage_seconds_total{{stage="{k}"}} {v[1]:.6f}' for k, v in self._totals.items()]
+            lines += ["# HELP meesha_stage_cpu_seconds_total CPU time spent per pipeline stage.",
+                      "# TYPE meesha_stage_cpu_seconds_total counter"]
+            lines += [f'meesha_stage_cpu_seconds_total{{stage="{k}"}} {v[2]:.6f}' for k, v in self._totals.items()]
+            lines += ["# HELP meesha_stage_calls_total Traces that ran each stage.",
+                      "# TYPE meesha_stage_calls_total counter"]
+            lines += [f'meesha_stage_calls_total{{stage="{k}"}} {v[0]}' for k, v in self._totals.items()]
+            directory = os.path.dirname(os.path.abspath(self.path))
+            try:
+                fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    f.write("\n".join(lines) + "\n")
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.warning("could not write %s: %s", self.path, e)
+
+
+class PanelExporter:
+    """Keeps the most recent traces for the Streamlit debug panel."""
+
+    def __init__(self, size=20):
+        self.traces = deque(maxlen=size)
+
+    def export(self, current):
+        self.traces.append(current.as_dict())
+
+    def latest(self, request_id=None):
+        for t in reversed(self.traces):
+            if request_id is None or t["request_id"] == request_id: return t
+        return None
+
+
+EXPORTERS = []
+panel = PanelExporter()
+
+
+def add_exporter(exporter):
+    """Registers anything with ``export(trace)``."""
+    EXPORTERS.append(exporter)
+
+
+def export(current):
+    for exporter in EXPORTERS:
+        try: exporter.export(current)
+        except Exception as e: logger.warning("trace exporter %r failed: %s", exporter, e)
+
+
+for _name in (n.strip() for n in config.PROFILE_EXPORTERS.split(",")):
+    if _name == "log": add_exporter(LogExporter())
+    elif _name == "prometheus": add_exporter(PrometheusTextExporter(config.PROMETHEUS_FILE))
+    elif _name == "panel": add_exporter(panel)
@@ -0,0 +1,255 @@
+"""Background report jobs backed by a local SQLite queue.
+
+The UI submits an upload and gets a job id back immediately; a bounded set of
+worker threads claims jobs in priority order (``PRIORITY_STAT`` first), runs the
+CPU-heavy extraction in a process pool and the render/merge steps on the thread,
+and records status and progress that the UI polls. Jobs survive restarts: on
+start-up anything left ``running`` by a previous process is queued again, so
+each database file should be drained by one process at a time.
+"""
+import logging
+import multiprocessing as mp
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from meesha import config, db as sqlite_db
+from meesha.extract import extraction_share
+from meesha.history import record_report, report_trends
+from meesha.instrument import merge_stages, run_captured, span, trace
+from meesha.pipeline import analyze_report, merge_pdfs, render_summary_html, render_summary_pdf
+from meesha.render import get_render_pool
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_STAT = 0
+PRIORITY_ROUTINE = 10
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT = "queued", "running", "done", "failed", "cancelled", "timeout"
+FINISHED = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    timeout REAL NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    csv_path TEXT NOT NULL,
+    logo_b64 TEXT,
+    payload BLOB,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, created);
+"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueue:
+    """Persistent priority queue plus the worker threads that drain it."""
+
+    def __init__(self, db_path, workers=None, cpu_workers=None, renderer=None, poll_interval=1.0):
+        self.db_path = db_path
+        self.workers = workers or config.JOB_WORKERS
+        self.cpu_workers = cpu_workers or config.JOB_CPU_WORKERS
+        self.renderer = renderer
+        self.poll_interval = poll_interval
+        self._db = sqlite_db.ThreadConnections(db_path, row_factory=sqlite3.Row)
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._cpu_pool = None
+        self._cpu_lock = threading.Lock()
+        self._extracting = 0
+        self._threads = []
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+        with self._db() as db:
+            db.executescript(SCHEMA)
+            # Work claimed by a previous process is lost with it; run it again.
+            db.execute("UPDATE jobs SET status=?, started=NULL, progress=0, stage=NULL WHERE status=?", (QUEUED, RUNNING))
+
+    # --- CLIENT API ---
+    def submit(self, pdf_bytes, csv_path, priority=PRIORITY_ROUTINE, timeout=None, logo_b64=None):
+        job_id = uuid.uuid4().hex
+        with self._db() as db:
+            db.execute("INSERT INTO jobs (id, status, priority, created, timeout, csv_path, logo_b64, payload) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                       (job_id, QUEUED, priority, time.time(), timeout or config.JOB_TIMEOUT, csv_path,
+                        logo_b64, sqlite3.Binary(pdf_bytes)))
+        with self._wakeup: self._wakeup.notify()
+        return job_id
+
+    def status(self, job_id):
+        with self._db() as db:
+            row = db.execute("SELECT id, status, priority, created, started, finished, progress, stage, error "
+                             "FROM jobs WHERE id=?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def result(self, job_id):
+        with self._db() as db:
+            row = db.execute("SELECT result FROM jobs WHERE id=? AND status=?", (job_id, DONE)).fetchone()
+        return pickle.loads(row["result"]) if row and row["result"] is not None else None
+
+    def cancel(self, job_id):
+        """Cancels a queued job outright; a running one stops at its next stage boundary."""
+        with self._db() as db:
+            db.execute("UPDATE jobs SET status=?, finished=?, payload=NULL WHERE id=? AND status=?",
+                       (CANCELLED, time.time(), job_id, QUEUED))
+            db.execute("UPDATE jobs SET cancel_requested=1 WHERE id=? AND status=?", (job_id, RUNNING))
+
+    def purge(self, older_than_hours=None):
+        """Deletes jobs (with their stored PDFs) finished more than ``JOB_RETENTION_HOURS`` ago."""
+        cutoff = time.time() - 3600 * (older_than_hours or config.JOB_RETENTION_HOURS)
+        with self._db() as db:
+            cur = db.execute(f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished < ?",
+                             (*FINISHED, cutoff))
+        return cur.rowcount
+
+    # --- WORKERS ---
+    def start(self):
+        if self._threads: return self
+        self._cpu_pool = self._new_cpu_pool()
+        self._maybe_purge()
+        self._threads = [threading.Thread(target=self._run, name=f"meesha-job-{i}", daemon=True)
+                         for i in range(self.workers)]
+        for t in self._threads: t.start()
+        return self
+
+    def _new_cpu_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+        # Spawned, not forked: the host process (Streamlit) is threaded.
+        return ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=mp.get_context("spawn"))
+
+    def _cpu(self, fn, *args):
+        """Submits to the extraction pool, replacing it first if a dead worker broke it."""
+        with self._cpu_lock:
+            try:
+                return self._cpu_pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (OOM, crash in a PDF library); the jobs it held have failed, later ones get a new pool.
+                logger.warning("extraction pool broken; starting a new one")
+                self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+                self._cpu_pool = self._new_cpu_pool()
+                return self._cpu_pool.submit(fn, *args)
+
+    def stop(self):
+        self._stopping = True
+        with self._wakeup: self._wakeup.notify_all()
+        for t in self._threads: t.join()
+        self._threads = []
+        if self._cpu_pool: self._cpu_pool.shutdown(cancel_futures=True)
+
+    def _claim(self):
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT id, timeout, csv_path, logo_b64, payload FROM jobs WHERE status=? "
+                             "ORDER BY priority, created LIMIT 1", (QUEUED,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE jobs SET status=?, started=?, stage=? WHERE id=?",
+                           (RUNNING, time.time(), "extracting", row["id"]))
+            db.execute("COMMIT")
+        return row
+
+    def _maybe_purge(self):
+        # One worker purges per interval; the others carry on claiming.
+        if time.monotonic() < self._next_purge or not self._purge_lock.acquire(blocking=False): return
+        try:
+            self._next_purge = time.monotonic() + config.JOB_PURGE_INTERVAL
+            purged = self.purge()
+            if purged: logger.info("purged %d finished jobs", purged)
+        except sqlite3.Error as e:
+            logger.warning("job purge failed: %s", e)
+        finally:
+            self._purge_lock.release()
+
+    def _run(self):
+        while not self._stopping:
+            self._maybe_purge()
+            job = self._claim()
+            if job is None:
+                with self._wakeup: self._wakeup.wait(self.poll_interval)  # also picks up other processes' jobs
+                continue
+            try:
+                with trace("job", job["id"]):
+                    report = self._execute(job)
+                self._finish(job["id"], DONE, result=pickle.dumps(report, protocol=pickle.HIGHEST_PROTOCOL))
+            except JobCancelled:
+                self._finish(job["id"], CANCELLED)
+            except FutureTimeout:
+                self._finish(job["id"], TIMED_OUT, error=f"exceeded {job['timeout']:.0f}s")
+            except Exception as e:
+                logger.exception("job %s failed", job["id"])
+                self._finish(job["id"], FAILED, error=f"{type(e).__name__}: {e}")
+
+    def _execute(self, job):
+        deadline = time.monotonic() + job["timeout"]
+        remaining = lambda: max(deadline - time.monotonic(), 0)
+        source = bytes(job["payload"])
+
+        # A large bundle may spread its pages over the cores other jobs are not using.
+        with self._cpu_lock:
+            share = extraction_share(self._extracting)
+            self._extracting += 1
+        try:
+            # The worker's spans (extraction, matching, ...) come back with its result.
+            (info, full_results, narrative), stages = self._cpu(run_captured, analyze_report, source,
+                                                                job["csv_path"], share).result(remaining())
+        finally:
+            with self._cpu_lock: self._extracting -= 1
+        merge_stages(stages)
+        trends = report_trends(info, full_results)
+        self._progress(job["id"], 0.6, "rendering")
+        if self.renderer is None and config.RENDER_BACKEND == "overlay":
+            with span("render"):
+                summary = render_summary_pdf(info, full_results, narrative, job["logo_b64"], trends)
+        else:
+            with span("template"):
+                html_output = render_summary_html(info, full_results, narrative, job["logo_b64"], trends)
+            renderer = self.renderer or get_render_pool()
+            with span("render"):
+                summary = renderer.submit(html_output).result(remaining()) if hasattr(renderer, "submit") else renderer.render(html_output)
+        self._progress(job["id"], 0.9, "merging")
+        with span("merge"):
+            final_pdf_bytes = merge_pdfs(summary, source)
+        if remaining() <= 0: raise FutureTimeout()
+        record_report(info, full_results, source)
+        return {"info": info, "full_results": full_results, "narrative": narrative, "trends": trends,
+                "pdf": final_pdf_bytes}
+
+    def _progress(self, job_id, progress, stage):
+        with self._db() as db:
+            row = db.execute("SELECT cancel_requested FROM jobs WHERE id=?", (job_id,)).fetchone()
+            if row is None or row["cancel_requested"]: raise JobCancelled()
+            db.execute("UPDATE jobs SET progress=?, stage=? WHERE id=?", (progress, stage, job_id))
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._db() as db:
+            db.execute("UPDATE jobs SET status=?, finished=?, progress=COALESCE(?, progress), stage=NULL, result=?, "
+                       "error=?, payload=NULL WHERE id=?",
+                       (status, time.time(), 1.0 if status == DONE else None, result, error, job_id))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Returns the process-wide queue (started) configured from ``meesha.config``."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(config.JOB_DB).start()
+        return _queue
@@ -0,0 +1,90 @@
+"""Single-pass catalog test-name matching.
+
+Replaces the old per-test ``re.search(rf"{name}[^0-9\\n]*?(\\d+\\.?\\d*)", ...)``
+loop with one Aho-Corasick scan over the report text. Every occurrence of every
+catalog name is visited (overlapping ones included), and the first occurrence
+that is followed by a number on the same line wins, exactly like the old loop.
+"""
+import re
+from collections import deque
+
+# Trailing-value rule of the legacy per-test pattern, applied at the end of a name.
+VALUE_PATTERN = re.compile(r"[^0-9\n]*?(\d+\.?\d*)")
+
+
+def _fold(text):
+    """Lower-cases text while keeping character offsets aligned with the source."""
+    low = text.lower()
+    if len(low) == len(text): return low
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class TestMatcher:
+    """Aho-Corasick automaton over the (case-folded) catalog test names."""
+
+    def __init__(self, names):
+        self.names = []
+        seen = set()
+        for name in names:
+            if isinstance(name, str) and name not in seen:
+                seen.add(name); self.names.append(name)
+
+        # Names folding to the same key (e.g. "HDL" / "hdl") share one key id.
+        self._key_ids = {}
+        self._name_keys = []
+        for name in self.names:
+            key = _fold(name)
+            self._name_keys.append(self._key_ids.setdefault(key, len(self._key_ids)))
+        self._empty_key = self._key_ids.get("")
+        self._build(k for k in self._key_ids if k)
+
+    def _build(self, keys):
+        goto = [{}]; out = [()]
+        for key in keys:
+            state = 0
+            for ch in key:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto); goto[state][ch] = nxt
+                    goto.append({}); out.append(())
+                state = nxt
+            out[state] = out[state] + (self._key_ids[key],)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]: f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                if out[fail[nxt]]: out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def scan(self, text):
+        """Returns ``{test_name: value_str}`` in catalog order for every name found in text."""
+        found = {}
+        if self._empty_key is not None:
+            m = VALUE_PATTERN.search(text)
+            if m: found[self._empty_key] = m.group(1)
+
+        pending = len(self._key_ids) - len(found)
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(_fold(text)):
+            while state and ch not in goto[state]: state = fail[state]
+            state = goto[state].get(ch, 0)
+            hits = out[state]
+            if not hits: continue
+            m = None
+            for key_id in hits:
+                if key_id in found: continue
+                if m is None:
+                    m = VALUE_PATTERN.match(text, i + 1)
+                    if not m: break
+                found[key_id] = m.group(1); pending -= 1
+            if not pending: break
+
+        return {name: found[k] for name, k in zip(self.names, self._name_keys) if k in found}
+
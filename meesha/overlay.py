@@ -0,0 +1,711 @@
+"""In-process summary renderer: report data drawn over a cached base PDF.
+
+The ``overlay`` render backend (``MEESHA_RENDER_BACKEND=overlay``) skips HTML and
+wkhtmltopdf entirely. Everything on the summary page that is the same for every
+patient (header, card outlines, zone grid, table heading, footer, logo) is drawn
+once per ``LAYOUT_VERSION`` and logo into a three-page base PDF (first page,
+table continuation page and blank continuation page) that is kept in memory.
+Per report only the dynamic layer is drawn: profile values, narrative, result
+rows, active zones and alert cards, as vector text and shapes in a small PDF of
+its own, whose pages pypdf then merges over the base pages. Narrative that does
+not fit the Clinical Insight card, and result rows that do not fit on the first
+page, continue on as many continuation pages as needed (narrative first), so
+nothing the HTML summary shows is dropped.
+
+Text uses the standard Helvetica faces (WinAnsi encoding), so no font files or
+external binaries are involved; characters outside WinAnsi print as ``?`` and
+the narrative's emoji are dropped. The layout mirrors ``HTML_TEMPLATE`` but is
+drawn from the constants below: bump ``LAYOUT_VERSION`` whenever they or the
+drawing code change, since cached reports are keyed on it.
+"""
+import base64
+import hashlib
+import html
+import io
+import re
+import struct
+import threading
+import zlib
+from functools import lru_cache
+
+LAYOUT_VERSION = "overlay-2"
+
+# --- PAGE GEOMETRY (points, measured from the top-left corner) ---
+PAGE_W, PAGE_H = 595.28, 841.89
+MARGIN = 42.5
+CONTENT_W = PAGE_W - 2 * MARGIN
+GAP = 20.0
+LEFT_W = round((CONTENT_W - GAP) * 0.6, 2)
+RIGHT_X = MARGIN + LEFT_W + GAP
+RIGHT_W = CONTENT_W - LEFT_W - GAP
+RULE_Y = 92.0
+GRID_TOP = 110.0
+CARD_PAD = 16.0
+PROFILE_H = 104.0
+INSIGHT_TOP = GRID_TOP + PROFILE_H + 16
+INSIGHT_H = 166.0
+ZONES_H = 174.0
+ALERTS_TOP = GRID_TOP + ZONES_H + 16
+FIRST_TABLE = (MARGIN, INSIGHT_TOP + INSIGHT_H + 34, LEFT_W)  # x, top, width of the results table
+NEXT_TABLE = (MARGIN, 136.0, CONTENT_W)
+NARRATIVE_SIZE, NARRATIVE_LEADING = 9.0, 13.5
+NARRATIVE_W = LEFT_W - 2 * CARD_PAD
+TABLE_HEAD_H = 22.0
+TABLE_COLUMNS = (0.42, 0.33, 0.25)  # test name, result, status
+CELL_PAD = 10.0
+ROW_PAD = 8.0
+ROW_LINE = 10.0
+CONTENT_BOTTOM = 784.0
+FOOTER_RULE_Y = 798.0
+FOOTER_TEXT_Y = 814.0
+FOOTER_TEXT = "Generated by Meesha Diagnostics AI • This summary is for informational support only."
+
+# (zone key, label) in the template's grid order.
+ZONE_GRID = (("heart", "Heart"), ("liver", "Liver"), ("kidney", "Kidney"),
+             ("blood", "Blood"), ("bone", "Bone"), ("neuro", "Neuro"))
+
+BRAND, BRAND_DARK = "#00BBD4", "#00838f"
+DARK, TEXT, TEXT_LIGHT, MUTED = "#1e293b", "#334155", "#64748b", "#94a3b8"
+DANGER, DANGER_SOFT, WARNING, WARNING_SOFT, SUCCESS = "#ef4444", "#fef2f2", "#f59e0b", "#fffbeb", "#10b981"
+LINE, LINE_LIGHT, PANEL = "#e2e8f0", "#f1f5f9", "#f8fafc"
+
+# Helvetica / Helvetica-Bold advance widths (AFM, 1/1000 em) for ASCII 32-126.
+_HELVETICA = (278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278) + (556,) * 10 + (
+    278, 278, 584, 584, 584, 556, 1015,
+    667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667,
+    944, 667, 667, 611,
+    278, 278, 278, 469, 556, 333,
+    556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500, 278, 556, 500,
+    722, 500, 500, 500,
+    334, 260, 334, 584)
+_HELVETICA_BOLD = (278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278) + (556,) * 10 + (
+    333, 333, 584, 584, 584, 611, 975,
+    722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778, 667, 778, 722, 667, 611, 722, 667,
+    944, 667, 667, 611,
+    333, 278, 333, 584, 556, 333,
+    556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611, 611, 611, 389, 556, 333, 611, 556,
+    778, 556, 556, 500,
+    389, 280, 389, 584)
+# Byte -> width; bytes outside ASCII get an average glyph width.
+WIDTHS = {False: (556,) * 32 + _HELVETICA + (556,) * 129, True: (556,) * 32 + _HELVETICA_BOLD + (556,) * 129}
+FONTS = {False: b"F1", True: b"F2"}
+
+# Base pages, by index in base_pages().
+FIRST_PAGE, TABLE_PAGE, BLANK_PAGE = 0, 1, 2
+
+
+# --- TEXT ---
+def _encode(text):
+    return " ".join(str(text).split()).encode("cp1252", "replace")
+
+
+def _printable(text):
+    """Drops characters WinAnsi cannot show (the narrative's emoji) instead of printing ``?``."""
+    return "".join(ch for ch in text if ch.encode("cp1252", "ignore"))
+
+
+def text_width(text, size, bold=False, spacing=0.0):
+    data = _encode(text)
+    widths = WIDTHS[bold]
+    return sum(widths[b] for b in data) * size / 1000 + spacing * len(data)
+
+
+def fit(text, width, size, bold=False):
+    """text, shortened with an ellipsis if it is wider than width."""
+    text = " ".join(str(text).split())
+    if text_width(text, size, bold) <= width: return text
+    while text and text_width(text + "...", size, bold) > width: text = text[:-1]
+    return text.rstrip() + "..."
+
+
+def wrap(text, width, size, bold=False, max_lines=None):
+    """Greedy word wrap; the last allowed line is ellipsised if text runs over."""
+    lines, line = [], ""
+    for word in str(text).split():
+        candidate = f"{line} {word}" if line else word
+        if line and text_width(candidate, size, bold) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    if line: lines.append(line)
+    if max_lines and len(lines) > max_lines:
+        lines = lines[:max_lines - 1] + [" ".join(lines[max_lines - 1:])]
+    return [fit(line, width, size, bold) for line in lines] or [""]
+
+
+_TAG = re.compile(r"<(/?)(\w+)([^>]*)>")
+_CLASS = re.compile(r"""class\s*=\s*["']([^"']*)["']""")
+_SPAN_STYLES = {"hl-crit": (True, DANGER), "hl-brand": (True, BRAND_DARK)}
+
+
+def narrative_words(markup):
+    """The narrative's inline HTML as ``(word, bold, color, space_before)`` tuples, None for ``<br>``."""
+    segments, stack, pos = [], [(False, TEXT)], 0
+    for m in _TAG.finditer(markup):
+        segments.append((markup[pos:m.start()], stack[-1]))
+        closing, tag = m.group(1), m.group(2).lower()
+        if tag == "br":
+            segments.append(None)
+        elif tag in ("b", "strong", "span"):
+            if closing:
+                if len(stack) > 1: stack.pop()
+            else:
+                cls = _CLASS.search(m.group(3))
+                style = _SPAN_STYLES.get(cls.group(1)) if cls else None
+                stack.append(style or ((True, stack[-1][1]) if tag != "span" else stack[-1]))
+        pos = m.end()
+    segments.append((markup[pos:], stack[-1]))
+
+    words, space = [], False
+    for seg in segments:
+        if seg is None:
+            words.append(None)
+            space = False
+            continue
+        text, (bold, color) = seg
+        text = _printable(html.unescape(text))
+        for i, word in enumerate(text.split()):
+            words.append((word, bold, color, space or i > 0 or text[:1].isspace()))
+        if text: space = text[-1:].isspace()
+    return words
+
+
+def layout_words(words, width, size):
+    """Lines of ``(dx, word, bold, color)`` for narrative_words output."""
+    lines, line, x = [], [], 0.0
+    for w in words:
+        if w is None:
+            lines.append(line)
+            line, x = [], 0.0
+            continue
+        word, bold, color, space = w
+        ww = text_width(word, size, bold)
+        gap = WIDTHS[False][32] * size / 1000 if space and line else 0.0
+        if line and x + gap + ww > width:
+            lines.append(line)
+            line, x, gap = [], 0.0, 0.0
+        line.append((x + gap, fit(word, width, size, bold), bold, color))
+        x += gap + ww
+    if line: lines.append(line)
+    while lines and not lines[-1]: lines.pop()
+    return lines
+
+
+# --- DRAWING ---
+@lru_cache(maxsize=None)
+def _rgb(color):
+    h = color.lstrip("#")
+    return b"%.3f %.3f %.3f" % tuple(int(h[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def _rect_path(x, y, w, h, r):
+    """Path of a (rounded) rectangle with its bottom-left corner at PDF coordinates (x, y)."""
+    if r <= 0: return b"%.2f %.2f %.2f %.2f re" % (x, y, w, h)
+    r = min(r, w / 2, h / 2)
+    k = r * 0.4477  # distance of the Bezier control points from the corner
+    x1, y1 = x + w, y + h
+    return (b"%.2f %.2f m %.2f %.2f l %.2f %.2f %.2f %.2f %.2f %.2f c %.2f %.2f l %.2f %.2f %.2f %.2f %.2f %.2f c "
+            b"%.2f %.2f l %.2f %.2f %.2f %.2f %.2f %.2f c %.2f %.2f l %.2f %.2f %.2f %.2f %.2f %.2f c h"
+            % (x + r, y, x1 - r, y, x1 - k, y, x1, y + k, x1, y + r,
+               x1, y1 - r, x1, y1 - k, x1 - k, y1, x1 - r, y1,
+               x + r, y1, x + k, y1, x, y1 - k, x, y1 - r,
+               x, y + r, x, y + k, x + k, y, x + r, y))
+
+
+class _Canvas:
+    """One page's content stream, addressed in points from the top-left corner."""
+
+    def __init__(self):
+        self._ops = []
+
+    def getvalue(self):
+        return b"\n".join(self._ops)
+
+    def _paint(self, path, fill, stroke, line_width):
+        ops = [b"q"]
+        if fill: ops.append(_rgb(fill) + b" rg")
+        if stroke: ops.append(_rgb(stroke) + b" RG %.2f w" % line_width)
+        ops.append(path)
+        ops.append(b"B" if fill and stroke else b"f" if fill else b"S")
+        ops.append(b"Q")
+        self._ops.append(b" ".join(ops))
+
+    def rect(self, x, top, w, h, fill=None, stroke=None, radius=0.0, line_width=0.75):
+        self._paint(_rect_path(x, PAGE_H - top - h, w, h, radius), fill, stroke, line_width)
+
+    def line(self, x0, y0, x1, y1, color, width=0.75):
+        self._paint(b"%.2f %.2f m %.2f %.2f l" % (x0, PAGE_H - y0, x1, PAGE_H - y1), None, color, width)
+
+    def circle(self, cx, cy, r, fill):
+        cy = PAGE_H - cy
+        k = r * 0.5523
+        self._paint(b"%.2f %.2f m %.2f %.2f %.2f %.2f %.2f %.2f c %.2f %.2f %.2f %.2f %.2f %.2f c "
+                    b"%.2f %.2f %.2f %.2f %.2f %.2f c %.2f %.2f %.2f %.2f %.2f %.2f c h"
+                    % (cx + r, cy, cx + r, cy + k, cx + k, cy + r, cx, cy + r,
+                       cx - k, cy + r, cx - r, cy + k, cx - r, cy,
+                       cx - r, cy - k, cx - k, cy - r, cx, cy - r,
+                       cx + k, cy - r, cx + r, cy - k, cx + r, cy), fill, None, 0)
+
+    def triangle(self, x, baseline, size, up, fill):
+        """A small up/down arrow sitting on the text baseline."""
+        y = PAGE_H - baseline
+        tip, base = (y + size, y) if up else (y, y + size)
+        self._paint(b"%.2f %.2f m %.2f %.2f l %.2f %.2f l h" % (x, base, x + size, base, x + size / 2, tip),
+                    fill, None, 0)
+
+    def text(self, x, baseline, text, size, bold=False, color=DARK, align="left", spacing=0.0):
+        data = _encode(text)
+        if not data: return 0.0
+        width = sum(WIDTHS[bold][b] for b in data) * size / 1000 + spacing * len(data)
+        if align == "right": x -= width
+        elif align == "center": x -= width / 2
+        data = data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+        self._ops.append(b"BT /%s %.2f Tf %s rg %.2f Tc %.2f %.2f Td (%s) Tj ET"
+                         % (FONTS[bold], size, _rgb(color), spacing, x, PAGE_H - baseline, data))
+        return width
+
+    def image(self, name, x, top, w, h):
+        self._ops.append(b"q %.2f 0 0 %.2f %.2f %.2f cm /%s Do Q" % (w, h, x, PAGE_H - top - h, name))
+
+
+def _card_title(c, x, baseline, title, color=MUTED):
+    c.text(x, baseline, title.upper(), 7.5, True, color, spacing=0.8)
+
+
+# --- LOGO ---
+class _Image:
+    """An image XObject: its dictionary entries, (encoded) samples and optional soft mask."""
+
+    def __init__(self, width, height, entries, data, smask=None):
+        self.width = width
+        self.height = height
+        self.entries = entries
+        self.data = data
+        self.smask = smask
+
+
+def _jpeg_image(data):
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF: return None
+        marker = data[pos + 1]
+        if marker == 0xFF: pos += 1; continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7: pos += 2; continue
+        (length,) = struct.unpack_from(">H", data, pos + 2)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            bpc, height, width, components = struct.unpack_from(">BHHB", data, pos + 4)
+            space = {1: b"/DeviceGray", 3: b"/DeviceRGB"}.get(components)
+            if space is None or bpc != 8: return None
+            return _Image(width, height, b"/ColorSpace %s /BitsPerComponent 8 /Filter /DCTDecode" % space, data)
+        pos += 2 + length
+    return None
+
+
+def _unfilter(raw, width, height, bpp):
+    """Undoes PNG scanline filters; returns the bare samples."""
+    stride = width * bpp
+    out = bytearray(stride * height)
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        kind = raw[pos]
+        line = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        if kind == 1:
+            for i in range(bpp, stride): line[i] = (line[i] + line[i - bpp]) & 255
+        elif kind == 2:
+            for i in range(stride): line[i] = (line[i] + prev[i]) & 255
+        elif kind == 3:
+            for i in range(stride): line[i] = (line[i] + ((line[i - bpp] if i >= bpp else 0) + prev[i]) // 2) & 255
+        elif kind == 4:
+            for i in range(stride):
+                a = line[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                line[i] = (line[i] + (a if pa <= pb and pa <= pc else b if pb <= pc else c)) & 255
+        out[y * stride:(y + 1) * stride] = line
+        prev = line
+    return out
+
+
+def _png_image(data):
+    pos, idat, palette, header = 8, [], None, None
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack_from(">I4s", data, pos)
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR": header = struct.unpack(">IIBBBBB", body)
+        elif kind == b"PLTE": palette = body
+        elif kind == b"IDAT": idat.append(body)
+        elif kind == b"IEND": break
+    if header is None: return None
+    width, height, depth, ctype, _, _, interlace = header
+    if depth != 8 or interlace or ctype not in (0, 2, 3, 4, 6): return None
+    stream = b"".join(idat)
+    if ctype in (0, 2, 3):
+        # PNG's scanline filters are PDF's PNG predictors, so the IDAT stream is used as-is.
+        colors = 3 if ctype == 2 else 1
+        if ctype == 3:
+            if not palette: return None
+            space = b"[/Indexed /DeviceRGB %d <%s>]" % (len(palette) // 3 - 1, palette.hex().encode())
+        else:
+            space = b"/DeviceRGB" if ctype == 2 else b"/DeviceGray"
+        return _Image(width, height, b"/ColorSpace %s /BitsPerComponent 8 /Filter /FlateDecode /DecodeParms "
+                                     b"<< /Predictor 15 /Colors %d /BitsPerComponent 8 /Columns %d >>"
+                      % (space, colors, width), stream)
+    # With alpha the channels have to be split, so the filters are undone here.
+    bpp = 4 if ctype == 6 else 2
+    samples = _unfilter(zlib.decompress(stream), width, height, bpp)
+    alpha = bytes(samples[bpp - 1::bpp])
+    color = bytearray(len(alpha) * (bpp - 1))
+    for i in range(bpp - 1): color[i::bpp - 1] = samples[i::bpp]
+    space = b"/DeviceRGB" if ctype == 6 else b"/DeviceGray"
+    return _Image(width, height, b"/ColorSpace %s /BitsPerComponent 8 /Filter /FlateDecode" % space,
+                  zlib.compress(bytes(color)), smask=zlib.compress(alpha))
+
+
+@lru_cache(maxsize=4)
+def _logo(logo_b64):
+    """The logo (PNG or JPEG, as ``assets.logo_b64`` returns it) as an image, or None if unusable."""
+    try:
+        data = base64.b64decode(logo_b64)
+        if data.startswith(b"\x89PNG\r\n\x1a\n"): return _png_image(data)
+        if data.startswith(b"\xff\xd8"): return _jpeg_image(data)
+    except (ValueError, struct.error, zlib.error, IndexError):
+        pass
+    return None
+
+
+# --- PDF ---
+def _stream(entries, data):
+    return b"<< %s /Length %d >>\nstream\n%s\nendstream" % (entries, len(data), data)
+
+
+def _pdf(pages, images=None):
+    """A4 PDF of page content streams sharing one resource dictionary."""
+    objects = [None, None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"]
+    xobjects = []
+    for name, img in (images or {}).items():
+        entries = b"/Type /XObject /Subtype /Image /Width %d /Height %d %s" % (img.width, img.height, img.entries)
+        if img.smask is not None:
+            objects.append(_stream(b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                                   b"/BitsPerComponent 8 /Filter /FlateDecode" % (img.width, img.height), img.smask))
+            entries += b" /SMask %d 0 R" % len(objects)
+        objects.append(_stream(entries, img.data))
+        xobjects.append(b"/%s %d 0 R" % (name, len(objects)))
+    xobject_dict = b" /XObject << %s >>" % b" ".join(xobjects) if xobjects else b""
+    objects.append(b"<< /Font << /F1 3 0 R /F2 4 0 R >>%s >>" % xobject_dict)
+    resources = len(objects)
+    kids = []
+    for content in pages:
+        objects.append(_stream(b"/Filter /FlateDecode", zlib.compress(content)))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources %d 0 R /Contents %d 0 R >>"
+                       % (PAGE_W, PAGE_H, resources, len(objects)))
+        kids.append(b"%d 0 R" % len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# --- STATIC LAYER ---
+def _zone_box(i):
+    """``(x, top, w, h)`` of zone i in the Impact Zones grid."""
+    inner = RIGHT_W - 2 * CARD_PAD
+    w, h, gap = (inner - 8) / 2, 34.0, 8.0
+    return RIGHT_X + CARD_PAD + (i % 2) * (w + gap), GRID_TOP + 40 + (i // 2) * (h + gap), w, h
+
+
+def _table_columns(x, width):
+    """Left edges and widths of the table's columns."""
+    cols, left = [], x
+    for share in TABLE_COLUMNS:
+        cols.append((left, width * share))
+        left += width * share
+    return cols
+
+
+def _draw_header(c, logo):
+    if logo is not None:
+        h = 48.0
+        w = min(h * logo.width / logo.height, 180.0)
+        c.image(b"Logo", MARGIN, 32, w, w * logo.height / logo.width)
+    else:
+        c.text(MARGIN, 66, "MEESHA", 22, True, BRAND)
+    c.text(PAGE_W - MARGIN, 56, "AI CLINICAL ANALYSIS", 7, True, BRAND, "right", spacing=1.5)
+    c.line(MARGIN, RULE_Y, PAGE_W - MARGIN, RULE_Y, LINE_LIGHT, 1.5)
+
+
+def _draw_table_head(c, x, top, width):
+    c.rect(x, top, width, TABLE_HEAD_H, fill=PANEL, radius=8)
+    c.rect(x, top + TABLE_HEAD_H / 2, width, TABLE_HEAD_H / 2, fill=PANEL)
+    c.line(x, top + TABLE_HEAD_H, x + width, top + TABLE_HEAD_H, LINE)
+    for (left, _), label in zip(_table_columns(x, width), ("TEST NAME", "RESULT", "STATUS")):
+        c.text(left + CELL_PAD, top + 14, label, 7, True, TEXT_LIGHT, spacing=0.5)
+
+
+def _draw_insight_card(c, top, height, title):
+    c.rect(MARGIN, top, LEFT_W, height, fill="#fbfeff", stroke="#e0f2fe", radius=12)
+    c.rect(MARGIN, top + 14, 3.5, height - 28, fill=BRAND, radius=1.75)
+    _card_title(c, MARGIN + CARD_PAD, top + 24, title, BRAND_DARK)
+
+
+def _draw_footer(c):
+    c.line(MARGIN, FOOTER_RULE_Y, PAGE_W - MARGIN, FOOTER_RULE_Y, LINE_LIGHT)
+    c.text(PAGE_W / 2, FOOTER_TEXT_Y, FOOTER_TEXT, 7, False, "#cbd5e1", "center", spacing=0.3)
+
+
+def base_pages(logo=None):
+    """Content streams of the static layer: ``[first page, table continuation page, blank continuation page]``."""
+    first = _Canvas()
+    _draw_header(first, logo)
+    c = first
+    c.rect(MARGIN, GRID_TOP, LEFT_W, PROFILE_H, fill="#ffffff", stroke=LINE_LIGHT, radius=12)
+    _card_title(c, MARGIN + CARD_PAD, GRID_TOP + 24, "Patient Profile")
+    col = (LEFT_W - 2 * CARD_PAD) / 2
+    for i, label in enumerate(("Patient Name", "Patient ID", "Age / Gender", "Referred By")):
+        c.text(MARGIN + CARD_PAD + (i % 2) * col, GRID_TOP + 46 + (i // 2) * 32, label.upper(), 6.5, True, TEXT_LIGHT)
+
+    _draw_insight_card(c, INSIGHT_TOP, INSIGHT_H, "Clinical Insight")
+
+    x, top, width = FIRST_TABLE
+    _card_title(c, x + 4, top - 10, "Comprehensive Test List")
+    _draw_table_head(c, x, top, width)
+
+    c.rect(RIGHT_X, GRID_TOP, RIGHT_W, ZONES_H, fill="#ffffff", stroke=LINE_LIGHT, radius=12)
+    _card_title(c, RIGHT_X + CARD_PAD, GRID_TOP + 24, "Impact Zones")
+    for i, (_, label) in enumerate(ZONE_GRID):
+        zx, zy, zw, zh = _zone_box(i)
+        c.rect(zx, zy, zw, zh, fill=PANEL, stroke=LINE, radius=8)
+        c.circle(zx + 17, zy + zh / 2, 8, "#e2e8f0")
+        c.text(zx + 31, zy + zh / 2 + 3, label, 8, True, TEXT_LIGHT)
+    _draw_footer(c)
+
+    nxt = _Canvas()
+    _draw_header(nxt, logo)
+    x, top, width = NEXT_TABLE
+    _card_title(nxt, x + 4, top - 10, "Comprehensive Test List (continued)")
+    _draw_table_head(nxt, x, top, width)
+    _draw_footer(nxt)
+
+    blank = _Canvas()
+    _draw_header(blank, logo)
+    _draw_footer(blank)
+    return [first.getvalue(), nxt.getvalue(), blank.getvalue()]
+
+
+_base_cache = {}
+_base_lock = threading.Lock()
+
+
+def base_pdf(logo_b64=None):
+    """The static layer as a three-page PDF, drawn once per layout version and logo."""
+    key = (LAYOUT_VERSION, hashlib.sha256(logo_b64.encode()).hexdigest() if logo_b64 else None)
+    pdf = _base_cache.get(key)
+    if pdf is None:
+        with _base_lock:
+            pdf = _base_cache.get(key)
+            if pdf is None:
+                logo = _logo(logo_b64) if logo_b64 else None
+                pdf = _base_cache[key] = _pdf(base_pages(logo), {b"Logo": logo} if logo is not None else None)
+    return pdf
+
+
+# --- DYNAMIC LAYER ---
+def _status_style(status):
+    if "Crit" in status: return "CRITICAL", DANGER
+    if "Normal" in status: return "NORMAL", SUCCESS
+    return "ABNORMAL", WARNING
+
+
+def _row_layout(test, trend, width):
+    """``(height, name lines, result lines)`` of one table row at the given table width."""
+    (_, name_w), (_, result_w), _ = _table_columns(0, width)
+    names = wrap(test["name"], name_w - 2 * CELL_PAD, 8, max_lines=2)
+    inner = result_w - 2 * CELL_PAD
+    value, ref = str(test["value"]), f"(Ref: {test['range']})"
+    value_w = text_width(value, 8.5, True)
+    if value_w + 4 + text_width(ref, 6.5) <= inner:
+        results = [[(0, value, 8.5, True, DARK), (value_w + 4, ref, 6.5, False, MUTED)]]
+    else:
+        results = [[(0, fit(value, inner, 8.5, True), 8.5, True, DARK)], [(0, fit(ref, inner, 6.5), 6.5, False, MUTED)]]
+    if trend:
+        label = f"{trend['delta']:+g} vs {trend['previous_date']}"
+        if trend["arrow"] in ("▲", "▼"):
+            results.append([(0, trend["arrow"], 5, False, TEXT_LIGHT), (8, fit(label, inner - 8, 6.5), 6.5, False, TEXT_LIGHT)])
+        else:
+            results.append([(0, fit(f"{trend['arrow']} {label}", inner, 6.5), 6.5, False, TEXT_LIGHT)])
+    return 2 * ROW_PAD + ROW_LINE * max(len(names), len(results)) - 3, names, results
+
+
+def _draw_row(c, test, layout, x, top, width, first):
+    height, names, results = layout
+    (name_x, _), (result_x, _), (status_x, _) = _table_columns(x, width)
+    if "Crit" in test["status"]: c.rect(x, top, width, height, fill="#fffbfb")
+    if not first: c.line(x, top, x + width, top, LINE_LIGHT)
+    baseline = top + ROW_PAD + 7
+    for i, line in enumerate(names):
+        c.text(name_x + CELL_PAD, baseline + i * ROW_LINE, line, 8, False, DARK)
+    for i, spans in enumerate(results):
+        for dx, text, size, bold, color in spans:
+            if text in ("▲", "▼"):
+                c.triangle(result_x + CELL_PAD + dx, baseline + i * ROW_LINE, size, text == "▲", color)
+            else:
+                c.text(result_x + CELL_PAD + dx, baseline + i * ROW_LINE, text, size, bold, color)
+    label, color = _status_style(test["status"])
+    c.circle(status_x + CELL_PAD + 2.5, baseline - 2.5, 2.5, color)
+    c.text(status_x + CELL_PAD + 9, baseline, label, 7, True, color)
+
+
+def _draw_table(pages, full_results, trends, spill=None):
+    """Draws the result rows, starting new continuation pages as the current one fills up.
+
+    ``spill`` is ``(canvas, top)``: room left on the last narrative page where the
+    table continues (with its own heading) before any new page is started.
+    """
+    c = pages[0][1]
+    x, top, width = FIRST_TABLE
+    y = top + TABLE_HEAD_H
+    on_page = 0
+    if not full_results:
+        c.text(x + CELL_PAD, y + ROW_PAD + 7, "No catalog tests were found in this report.", 8, False, MUTED)
+        y += 2 * ROW_PAD + ROW_LINE - 3
+    for test in full_results:
+        layout = _row_layout(test, trends.get(test["name"]), width)
+        if on_page and y + layout[0] > CONTENT_BOTTOM:
+            c.rect(x, top, width, y - top, stroke=LINE, radius=8)
+            x, _, width = NEXT_TABLE
+            layout = _row_layout(test, trends.get(test["name"]), width)
+            if spill and spill[1] + TABLE_HEAD_H + layout[0] <= CONTENT_BOTTOM:
+                c, top = spill
+                _card_title(c, x + 4, top - 10, "Comprehensive Test List (continued)")
+                _draw_table_head(c, x, top, width)
+            else:
+                c, top = _Canvas(), NEXT_TABLE[1]
+                pages.append((TABLE_PAGE, c))
+            spill = None
+            y, on_page = top + TABLE_HEAD_H, 0
+        _draw_row(c, test, layout, x, y, width, on_page == 0)
+        y += layout[0]
+        on_page += 1
+    c.rect(x, top, width, y - top, stroke=LINE, radius=8)
+
+
+def _draw_narrative(pages, narrative):
+    """Fills the Clinical Insight card and continues the rest on blank pages; returns the table ``spill``."""
+    size, leading = NARRATIVE_SIZE, NARRATIVE_LEADING
+    lines = layout_words(narrative_words(narrative or ""), NARRATIVE_W, size)
+    top = INSIGHT_TOP + 46
+    room = int((INSIGHT_TOP + INSIGHT_H - 12 - top) // leading) + 1
+    if len(lines) > room: room -= 1  # the last line says where the text continues
+    c = pages[0][1]
+    for i, line in enumerate(lines[:room]):
+        for dx, word, bold, color in line:
+            c.text(MARGIN + CARD_PAD + dx, top + i * leading, word, size, bold, color)
+    rest = lines[room:]
+    while rest and not rest[0]: rest.pop(0)
+    if not rest: return None
+    c.text(MARGIN + CARD_PAD, top + room * leading, f"Continued on page {len(pages) + 1}", 7.5, True, MUTED)
+
+    per_page = int((CONTENT_BOTTOM - 16 - (GRID_TOP + 46)) // leading) + 1
+    while rest:
+        chunk, rest = rest[:per_page], rest[per_page:]
+        c = _Canvas()
+        pages.append((BLANK_PAGE, c))
+        height = 46 + (len(chunk) - 1) * leading + 16
+        _draw_insight_card(c, GRID_TOP, height, "Clinical Insight (continued)")
+        for i, line in enumerate(chunk):
+            for dx, word, bold, color in line:
+                c.text(MARGIN + CARD_PAD + dx, GRID_TOP + 46 + i * leading, word, size, bold, color)
+    return c, GRID_TOP + height + 34
+
+
+def _draw_alerts(c, critical_tests):
+    if not critical_tests: return
+    x, width = RIGHT_X, RIGHT_W
+    card_h, gap = 44.0, 8.0
+    room = int((CONTENT_BOTTOM - ALERTS_TOP - 40 - 14 + gap) // (card_h + gap))
+    shown = critical_tests if len(critical_tests) <= room else critical_tests[:max(room - 1, 0)]
+    height = 40 + len(shown) * (card_h + gap) - gap + 14 + (14 if len(shown) < len(critical_tests) else 0)
+    c.rect(x, ALERTS_TOP, width, height, fill="#ffffff", stroke="#fee2e2", radius=12)
+    _card_title(c, x + CARD_PAD, ALERTS_TOP + 24, "Action Required", DANGER)
+    inner_x, inner_w = x + CARD_PAD - 4, width - 2 * CARD_PAD + 8
+    top = ALERTS_TOP + 40
+    for test in shown:
+        crit = "Crit" in test["status"]
+        c.rect(inner_x, top, inner_w, card_h, fill=DANGER_SOFT if crit else WARNING_SOFT, radius=8)
+        c.rect(inner_x, top, 3.5, card_h, fill=DANGER if crit else WARNING, radius=1.75)
+        pill = str(test["status"]).upper()
+        pill_w = text_width(pill, 6, True, 0.3) + 10
+        c.rect(inner_x + inner_w - 10 - pill_w, top + 7, pill_w, 12, fill="#ffffff", radius=4)
+        c.text(inner_x + inner_w - 15, top + 15.5, pill, 6, True, DANGER if crit else "#b45309", "right", spacing=0.3)
+        c.text(inner_x + 12, top + 16, fit(test["name"], inner_w - pill_w - 30, 8.5, True), 8.5, True, DARK)
+        value = str(test["value"])
+        value_w = c.text(inner_x + 12, top + 35, value, 12, True, DARK)
+        c.text(inner_x + 18 + value_w, top + 35, fit(f"Ref: {test['range']}", inner_w - value_w - 30, 7), 7, False,
+               TEXT_LIGHT)
+        top += card_h + gap
+    if len(shown) < len(critical_tests):
+        c.text(x + CARD_PAD, top + 4, f"+ {len(critical_tests) - len(shown)} more in the test list", 7.5, True,
+               TEXT_LIGHT)
+
+
+def overlay_pages(info, full_results, narrative, critical_tests, body_flags, trends=None):
+    """The dynamic layer as ``[(base page index, content stream)]``, one per summary page."""
+    c = _Canvas()
+    pages = [(FIRST_PAGE, c)]
+    col = (LEFT_W - 2 * CARD_PAD) / 2
+    fields = ("patient_name", "patient_id", "age_gender", "doctor")
+    for i, field in enumerate(fields):
+        c.text(MARGIN + CARD_PAD + (i % 2) * col, GRID_TOP + 62 + (i // 2) * 32,
+               fit(info.get(field, "Unknown"), col - 8, 10.5, True), 10.5, True, DARK)
+
+    spill = _draw_narrative(pages, narrative)
+
+    for i, (zone, label) in enumerate(ZONE_GRID):
+        if zone not in body_flags: continue
+        zx, zy, zw, zh = _zone_box(i)
+        c.rect(zx, zy, zw, zh, fill="#fff5f5", stroke="#fecaca", radius=8)
+        c.circle(zx + 17, zy + zh / 2, 8, "#fee2e2")
+        c.circle(zx + 17, zy + zh / 2, 3, DANGER)
+        c.text(zx + 31, zy + zh / 2 + 3, label, 8, True, DANGER)
+    _draw_alerts(c, critical_tests)
+    _draw_table(pages, full_results, trends or {}, spill)
+
+    for i, (_, page) in enumerate(pages, 1):
+        page.text(PAGE_W - MARGIN, 72, info.get("report_date", ""), 9, True, TEXT_LIGHT, "right")
+        if len(pages) > 1: page.text(PAGE_W - MARGIN, FOOTER_TEXT_Y, f"Page {i} of {len(pages)}", 7, False, MUTED, "right")
+    return [(base, page.getvalue()) for base, page in pages]
+
+
+def overlay_pdf(info, full_results, narrative, critical_tests, body_flags, trends=None):
+    """``(pdf, base page index per page)`` of the dynamic layer."""
+    pages = overlay_pages(info, full_results, narrative, critical_tests, body_flags, trends)
+    return _pdf([content for _, content in pages]), [base for base, _ in pages]
+
+
+def render_summary(info, full_results, narrative, critical_tests, body_flags, logo_b64=None, trends=None):
+    """Summary page(s) as PDF bytes: this report's layer merged over the cached base pages."""
+    from pypdf import PdfReader, PdfWriter
+    base = PdfReader(io.BytesIO(base_pdf(logo_b64)))
+    overlay, bases = overlay_pdf(info, full_results, narrative, critical_tests, body_flags, trends)
+    writer = PdfWriter()
+    for page, index in zip(PdfReader(io.BytesIO(overlay)).pages, bases):
+        writer.add_page(page).merge_page(base.pages[index], over=False)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
@@ -0,0 +1,220 @@
+"""Report pipeline: text extraction, analysis, summary rendering and merging.
+
+Shared by the Streamlit UI (``streamlit_app.py``) and the headless batch CLI
+(``python -m meesha.batch``); nothing in here touches Streamlit.
+"""
+import io
+import logging
+import re
+from datetime import datetime
+
+from meesha import config, overlay
+from meesha.catalog import get_catalog
+from meesha.classify import zones_for_test
+from meesha.extract import iter_page_texts, open_source
+from meesha.header import HEADER_FIELDS, extract_header, find_fields
+from meesha.instrument import span
+from meesha.profiles import extract_profiled
+from meesha.render import get_render_pool
+from meesha.template import get_template
+
+logger = logging.getLogger(__name__)
+
+# --- UTILITY FUNCTIONS ---
+
+def load_reference_db(csv_path):
+    try:
+        return get_catalog(csv_path)
+    except Exception as e:
+        logger.error("Error loading CSV database: %s", e)
+        return None
+
+def determine_age_gender_nums(age_gender_str):
+    try:
+        age = 30; sex = 'Both'
+        age_match = re.search(r"(\d{1,3})", age_gender_str)
+        if age_match: age = int(age_match.group(1))
+        if 'female' in age_gender_str.lower() or ' f ' in age_gender_str.lower(): sex = 'Female'
+        elif 'male' in age_gender_str.lower() or ' m ' in age_gender_str.lower(): sex = 'Male'
+        return age, sex
+    except: return 30, 'Both'
+
+def get_status(value, low, high):
+    try:
+        val = float(value); l = float(low); h = float(high)
+        if val < l:
+            if val < (l * 0.7): return "Crit Low", "crit"
+            return "Low", "warn"
+        elif val > h:
+            if val > (h * 1.3): return "Crit High", "crit"
+            return "High", "warn"
+        return "Normal", "norm"
+    except: return "Normal", "norm"
+
+def map_body_impact(abnormal_tests):
+    flags = []
+    for test in abnormal_tests:
+        for zone in zones_for_test(test['name']):
+            if zone not in flags: flags.append(zone)
+    return flags
+
+def read_report_text(source, catalog=None, max_pages=None, workers=None):
+    """Streams pages until header fields and catalog tests are all resolved or max_pages is hit.
+
+    ``workers`` caps the processes a large document is extracted with (see
+    ``meesha.extract.iter_page_texts``).
+
+    Returns ``(full_text, matches)``; matches is the catalog matcher's result over the
+    pages read. Test values never cross a line, so matching page by page is exact.
+    """
+    if max_pages is None: max_pages = config.MAX_PAGES
+    chunks = []
+    found = {}
+    header_pending = set(HEADER_FIELDS)
+    total = len(catalog.matcher.names) if catalog is not None else 0
+    pages = iter_page_texts(source, max_pages, workers)
+    while True:
+        with span("extraction"):
+            page = next(pages, None)
+        if page is None: break
+        txt = page[1]
+        chunks.append(txt)
+        if catalog is not None:
+            with span("matching"):
+                for name, val in catalog.matcher.scan(txt).items(): found.setdefault(name, val)
+        if header_pending: header_pending -= find_fields(txt, header_pending).keys()
+        if not header_pending and catalog is not None and len(found) == total:
+            pages.close()
+            break
+
+    full_text = "\n".join(chunks) + "\n" if chunks else ""
+    if catalog is not None: found = {n: found[n] for n in catalog.matcher.names if n in found}
+    return full_text, found
+
+def analyze_matches(info, matches, catalog):
+    """Turns ``{test_name: value_str}`` into result rows with reference ranges and status."""
+    p_age, p_sex = determine_age_gender_nums(info["age_gender"])
+    found_tests = []
+    
+    for test_name, val_str in matches.items():
+        try:
+            value = float(val_str)
+            
+            if ("Haemoglobin" in test_name or "Hemoglobin" in test_name) and value < 3.0:
+                 continue 
+
+            band = catalog.ranges.lookup(test_name, p_age, p_sex)
+            if band is None: continue
+            low, high = band
+            status_txt, css = get_status(value, low, high)
+            
+            found_tests.append({
+                "name": test_name, "value": value, "range": f"{low} - {high}",
+                "status": status_txt, "css_class": css
+            })
+        except: continue
+
+    return found_tests
+
+def extract_comprehensive_data(source, csv_path, max_pages=None, extract_workers=None):
+    with span("catalog"):
+        catalog = load_reference_db(csv_path)
+    with span("profile"):
+        targeted = extract_profiled(source, catalog)
+    if targeted is not None:
+        info, matches = targeted
+        with span("analysis"):
+            return info, analyze_matches(info, matches, catalog)
+    full_text, matches = read_report_text(source, catalog, max_pages, extract_workers)
+    with span("header"):
+        info = extract_header(full_text)
+    if catalog is None: return info, []
+    with span("analysis"):
+        return info, analyze_matches(info, matches, catalog)
+
+def generate_safe_summary(info, results):
+    """Generates a summary WITHOUT specific numeric values to avoid errors."""
+    abnormal_tests = [t for t in results if t['status'] != "Normal"]
+    
+    if not abnormal_tests:
+        return "✅ <span class='hl-brand'>All Systems Stable.</span> Comprehensive review shows all extracted biomarkers are within optimal ranges."
+    
+    crit = [t for t in abnormal_tests if "Crit" in t['status']]
+    warn = [t for t in abnormal_tests if "Crit" not in t['status']]
+    
+    lines = []
+    if crit:
+        names = ", ".join([f"<b>{t['name']}</b>" for t in crit])
+        lines.append(f"<span class='hl-crit'>CRITICAL ALERT:</span> Severe deviations found in {names}. Immediate clinical review is strongly recommended.")
+    
+    if warn:
+        names = ", ".join([t['name'] for t in warn[:4]])
+        count_rest = len(warn) - 4
+        suffix = f" and {count_rest} others" if count_rest > 0 else ""
+        lines.append(f"<b>Observation:</b> Mild variations detected in {names}{suffix}. These may require routine monitoring or lifestyle adjustments.")
+        
+    return "<br><br>".join(lines)
+
+def render_summary_html(info, full_results, narrative, logo_b64=None, trends=None):
+    abnormal_tests = [t for t in full_results if t['status'] != "Normal"]
+    body_flags = map_body_impact(abnormal_tests)
+
+    return get_template("summary").render(
+        patient_name=info["patient_name"],
+        patient_id=info["patient_id"],
+        patient_age_gender=info["age_gender"],
+        doctor_name=info["doctor"],
+        report_date=info["report_date"],
+        narrative=narrative,
+        full_results=full_results,
+        critical_tests=abnormal_tests,
+        body_flags=body_flags,
+        logo_b64=logo_b64,
+        trends=trends or {}
+    )
+
+def render_summary_pdf(info, full_results, narrative, logo_b64=None, trends=None):
+    """Summary page(s) drawn in-process by the ``overlay`` backend; no HTML, no render pool."""
+    abnormal_tests = [t for t in full_results if t['status'] != "Normal"]
+    return overlay.render_summary(info, full_results, narrative, abnormal_tests, map_body_impact(abnormal_tests),
+                                  logo_b64, trends)
+
+def analyze_report(source, csv_path, extract_workers=None):
+    """Extracts patient info and test results, returning ``(info, full_results, narrative)``."""
+    info, full_results = extract_comprehensive_data(source, csv_path, extract_workers=extract_workers)
+    if info['date'] == "Unknown": info['report_date'] = datetime.now().strftime("%d-%m-%Y")
+    else: info['report_date'] = info['date']
+    with span("summary"):
+        return info, full_results, generate_safe_summary(info, full_results)
+
+def merge_pdfs(summary_pdf_bytes, source):
+    """Prepends the rendered summary page(s) to the original report, entirely in memory."""
+    from pypdf import PdfWriter
+    merger = PdfWriter()
+    merger.append(io.BytesIO(summary_pdf_bytes))
+    merger.append(open_source(source))
+    out = io.BytesIO()
+    merger.write(out)
+    merger.close()
+    return out.getvalue()
+
+def build_report(source, csv_path, logo_b64=None, renderer=None, extract_workers=None):
+    """Runs the full pipeline for one PDF and returns the report dict (including merged PDF bytes).
+
+    ``source`` is a path or the uploaded PDF bytes. ``renderer`` is anything with
+    ``render(html) -> bytes``; defaults to the shared ``RenderPool``, or to drawing
+    in-process when ``MEESHA_RENDER_BACKEND=overlay``. ``extract_workers`` caps the
+    processes a large document's pages are extracted with.
+    """
+    info, full_results, narrative = analyze_report(source, csv_path, extract_workers)
+    if renderer is None and config.RENDER_BACKEND == "overlay":
+        with span("render"):
+            summary_pdf = render_summary_pdf(info, full_results, narrative, logo_b64)
+    else:
+        with span("template"):
+            html_output = render_summary_html(info, full_results, narrative, logo_b64)
+        with span("render"):
+            summary_pdf = (renderer or get_render_pool()).render(html_output)
+    with span("merge"):
+        final_pdf_bytes = merge_pdfs(summary_pdf, source)
+    return {"info": info, "full_results": full_results, "narrative": narrative, "pdf": final_pdf_bytes}
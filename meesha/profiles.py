@@ -0,0 +1,202 @@
+"""Lab layout profiles and the fingerprint dispatcher.
+
+A profile describes one lab's report layout: the boxes on the first page that
+hold the header fields, and where the results table sits. ``identify`` picks a
+profile from cheap fingerprints of the document, each a dict lookup: a hash of
+the first page's letterhead text, a marker line in that letterhead (lab name /
+logo text), then the PDF producer. ``extract_profiled`` reads the header boxes
+and table cells directly and maps row labels to catalog tests by name, so the
+report text is never scanned for every catalog name. When no profile matches,
+or a profile yields no results, it returns None and the caller falls back to
+the generic text path.
+
+Profiles are registered in code with ``register_profile`` or dropped in as JSON
+files (``LayoutProfile.from_dict`` keys) under ``MEESHA_LAYOUT_PROFILE_DIR``.
+Boxes are ``(x0, top, x1, bottom)`` fractions of the page size, so they hold for
+any page dimensions.
+
+    {"name": "acme-labs", "markers": ["ACME Diagnostics Pvt Ltd"],
+     "header_regions": {"patient_name": [0.05, 0.16, 0.5, 0.19], ...},
+     "results": {"pages": null, "bbox": [0, 0.25, 1, 0.92], "name_col": 0, "value_col": 1},
+     "aliases": {"Hb": "Haemoglobin"}}
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import weakref
+
+from meesha import config
+from meesha.extract import open_source
+from meesha.header import HEADER_FIELDS, field_value
+from meesha.matcher import VALUE_PATTERN
+
+logger = logging.getLogger(__name__)
+
+LETTERHEAD_FRACTION = 0.15  # top share of page 1 used for hashing and markers
+
+
+def label_key(text):
+    """Normalised lookup key for a test label or letterhead line."""
+    return " ".join(str(text).split()).casefold()
+
+
+class ResultTable:
+    """Where the results table is and which columns hold the test name and value."""
+
+    def __init__(self, pages=None, bbox=None, name_col=0, value_col=1, table_settings=None):
+        self.pages = tuple(pages) if pages is not None else None  # None = every page
+        self.bbox = tuple(bbox) if bbox is not None else None  # None = whole page
+        self.name_col = name_col
+        self.value_col = value_col
+        self.table_settings = table_settings or {}
+
+
+class LayoutProfile:
+    def __init__(self, name, header_regions=None, results=None, letterhead_hashes=(), markers=(), producers=(),
+                 aliases=None):
+        self.name = name
+        self.header_regions = {f: tuple(box) for f, box in (header_regions or {}).items() if f in HEADER_FIELDS}
+        self.results = results or ResultTable()
+        self.letterhead_hashes = tuple(letterhead_hashes)
+        self.markers = tuple(markers)
+        self.producers = tuple(producers)
+        self.aliases = {label_key(k): v for k, v in (aliases or {}).items()}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["name"], header_regions=d.get("header_regions"),
+                   results=ResultTable(**d["results"]) if d.get("results") else None,
+                   letterhead_hashes=d.get("letterhead_hashes", ()), markers=d.get("markers", ()),
+                   producers=d.get("producers", ()), aliases=d.get("aliases"))
+
+
+# --- REGISTRY ---
+_lock = threading.Lock()
+PROFILES = {}
+_by_hash = {}
+_by_marker = {}
+_by_producer = {}
+
+
+def register_profile(profile):
+    """Adds (or replaces) a profile and indexes its fingerprints."""
+    with _lock:
+        old = PROFILES.pop(profile.name, None)
+        for index in (_by_hash, _by_marker, _by_producer):
+            for k in [k for k, p in index.items() if p is old]: del index[k]
+        PROFILES[profile.name] = profile
+        for h in profile.letterhead_hashes: _by_hash[h] = profile
+        for m in profile.markers: _by_marker[label_key(m)] = profile
+        for p in profile.producers: _by_producer[label_key(p)] = profile
+    return profile
+
+
+def load_profiles(directory):
+    """Registers every ``*.json`` profile in directory; bad files are logged and skipped."""
+    for fname in sorted(os.listdir(directory)):
+        if not fname.endswith(".json"): continue
+        try:
+            with open(os.path.join(directory, fname), encoding="utf-8") as f:
+                register_profile(LayoutProfile.from_dict(json.load(f)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("skipping layout profile %s: %s", fname, e)
+
+
+def profiles_version():
+    """Hash of the registered profiles, for cache keys."""
+    with _lock:
+        desc = json.dumps({name: vars(p) for name, p in PROFILES.items()}, default=vars, sort_keys=True)
+    return hashlib.sha256(desc.encode()).hexdigest()[:12]
+
+
+# --- FINGERPRINTING ---
+def _crop(page, box):
+    x0, top, x1, bottom = box
+    return page.crop((x0 * page.width, top * page.height, x1 * page.width, bottom * page.height))
+
+
+def letterhead_text(page):
+    return _crop(page, (0, 0, 1, LETTERHEAD_FRACTION)).extract_text() or ""
+
+
+def letterhead_hash(text):
+    """Fingerprint of a letterhead; put this in a profile's ``letterhead_hashes``."""
+    return hashlib.sha1(label_key(text).encode()).hexdigest()[:16]
+
+
+def identify(pdf):
+    """The profile for an open pdfplumber document, or None."""
+    if not PROFILES or not pdf.pages: return None
+    text = letterhead_text(pdf.pages[0])
+    profile = _by_hash.get(letterhead_hash(text))
+    if profile is None:
+        profile = next((_by_marker[k] for k in map(label_key, text.splitlines()) if k in _by_marker), None)
+    if profile is None:
+        profile = _by_producer.get(label_key((pdf.metadata or {}).get("Producer", "")))
+    return profile
+
+
+# --- TARGETED EXTRACTION ---
+_label_indexes = weakref.WeakKeyDictionary()
+
+
+def _label_index(catalog):
+    """``{label_key: (catalog position, test name)}``, built once per catalog."""
+    index = _label_indexes.get(catalog)
+    if index is None:
+        index = {}
+        for pos, name in enumerate(catalog.matcher.names): index.setdefault(label_key(name), (pos, name))
+        _label_indexes[catalog] = index
+    return index
+
+
+def extract_with_profile(pdf, profile, catalog):
+    """``(info, matches)`` read from the profile's regions; None if its table gave no catalog tests."""
+    first = pdf.pages[0]
+    info = {f: "Unknown" for f in HEADER_FIELDS}
+    for field, box in profile.header_regions.items():
+        value = field_value(field, _crop(first, box).extract_text() or "")
+        if value: info[field] = value
+
+    index = _label_index(catalog)
+    table = profile.results
+    found = {}
+    for i in table.pages if table.pages is not None else range(len(pdf.pages)):
+        if i >= len(pdf.pages): continue
+        page = pdf.pages[i]
+        region = _crop(page, table.bbox) if table.bbox else page
+        for rows in region.extract_tables(table.table_settings):
+            for row in rows:
+                if max(table.name_col, table.value_col) >= len(row): continue
+                label, cell = row[table.name_col], row[table.value_col]
+                if not label or not cell: continue
+                key = label_key(label)
+                hit = index.get(label_key(profile.aliases[key])) if key in profile.aliases else index.get(key)
+                m = VALUE_PATTERN.search(cell)
+                if hit and m: found.setdefault(hit, m.group(1))
+        close = getattr(page, "close", None)
+        if close: close()
+    if not found: return None
+    return info, {name: val for (_, name), val in sorted(found.items())}
+
+
+def extract_profiled(source, catalog):
+    """Fingerprints the document and, if a profile matches, extracts with it; else None."""
+    if not PROFILES or catalog is None: return None
+    import pdfplumber
+    try:
+        with pdfplumber.open(open_source(source)) as pdf:
+            profile = identify(pdf)
+            if profile is None: return None
+            result = extract_with_profile(pdf, profile, catalog)
+    except Exception as e:
+        logger.debug("layout profile extraction failed, using text path: %s", e)
+        return None
+    if result is None: logger.debug("profile %s matched but found no results", profile.name)
+    return result
+
+
+if config.LAYOUT_PROFILE_DIR and os.path.isdir(config.LAYOUT_PROFILE_DIR):
+    load_profiles(config.LAYOUT_PROFILE_DIR)
@@ -0,0 +1,118 @@
+"""Reference-range index built once from the catalog rows.
+
+Reproduces the old ``df[df['testname'] == name]`` + ``iterrows()`` selection:
+the first catalog row (in CSV order) whose ``fromage <= age <= toage`` and whose
+``sextype`` is ``Both`` or equals the patient sex wins, otherwise the test's
+first row is used. A row the old loop could not compare (an age that is not a
+number, including numeric strings such as ``"45"``, or a non-string
+``sextype``) drops the test for every age that reaches it, as the old
+``TypeError`` did; a NaN age never matches. Each test keeps its age axis split
+into elementary segments (the band endpoints plus the open gaps between them)
+with the winning row precomputed per segment, so a lookup is a single
+``bisect`` over an ``array``. ``benchmarks/check_range_parity.py`` compares it
+with the old loop.
+"""
+import math
+import numbers
+from array import array
+from bisect import bisect_left
+
+NO_MATCH = -1   # no row covers the age: fall back to the first row
+POISON = -2     # the legacy loop raised on this row and dropped the test
+
+
+def _age(value):
+    # Only real numbers compared with the int patient age; anything else raised TypeError.
+    return float(value) if isinstance(value, numbers.Real) else None
+
+
+class _TestBands:
+    __slots__ = ("low", "high", "tables", "wildcard")
+
+    def __init__(self, rows):
+        # rows: [(fromage, toage, sextype, low, high), ...] in CSV order
+        self.low = [r[3] for r in rows]
+        self.high = [r[4] for r in rows]
+        bands = []
+        for idx, (lo, hi, sex, _, _) in enumerate(rows):
+            # Mirrors ``fromage <= age <= toage``: toage is only compared once fromage <= age.
+            lo, hi = _age(lo), _age(hi)
+            if lo is None: bands.append((-math.inf, math.inf, None, POISON)); continue
+            if math.isnan(lo): continue
+            if hi is None: bands.append((lo, math.inf, None, POISON)); continue
+            if math.isnan(hi): continue
+            if sex == 'Both': bands.append((lo, hi, None, idx))
+            elif isinstance(sex, str): bands.append((lo, hi, sex.lower(), idx))
+            else: bands.append((lo, hi, None, POISON))  # sextype.lower() raised
+
+        keys = {b[2] for b in bands if b[2] is not None}
+        self.tables = {k: self._table([b for b in bands if b[2] in (None, k)]) for k in keys}
+        self.wildcard = self._table([b for b in bands if b[2] is None])
+
+    @staticmethod
+    def _table(bands):
+        points = sorted({b[0] for b in bands} | {b[1] for b in bands})
+        on_point = array('i', [NO_MATCH] * len(points))
+        in_gap = array('i', [NO_MATCH] * max(len(points) - 1, 0))
+        for p, x in enumerate(points):
+            for lo, hi, _, winner in bands:
+                if lo <= x <= hi: on_point[p] = winner; break
+        for g in range(len(in_gap)):
+            for lo, hi, _, winner in bands:
+                if lo <= points[g] and points[g + 1] <= hi: in_gap[g] = winner; break
+        return array('d', points), on_point, in_gap
+
+    def pick(self, age, sex):
+        points, on_point, in_gap = self.tables.get(sex.lower(), self.wildcard)
+        i = bisect_left(points, age)
+        if i < len(points) and points[i] == age: return on_point[i]
+        if 0 < i < len(points): return in_gap[i - 1]
+        return NO_MATCH
+
+
+class RangeIndex:
+    """Maps test name -> age/sex bands; ``lookup`` returns ``(low, high)`` or None."""
+
+    def __init__(self, testname, fromage, toage, sextype, lowvalue, uppervalue):
+        grouped = {}
+        for row in zip(testname, fromage, toage, sextype, lowvalue, uppervalue):
+            grouped.setdefault(row[0], []).append(row[1:])
+        self._tests = {name: _TestBands(rows) for name, rows in grouped.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(*(df[c].tolist() for c in ('testname', 'fromage', 'toage', 'sextype', 'lowvalue', 'uppervalue')))
+
+    def __contains__(self, test_name):
+        return self._bands(test_name) is not None
+
+    def _bands(self, test_name):
+        return self._tests.get(test_name)
+
+    def lookup(self, test_name, age, sex):
+        bands = self._bands(test_name)
+        if bands is None: return None
+        winner = bands.pick(age, sex)
+        if winner == POISON: return None
+        if winner == NO_MATCH: winner = 0
+        return bands.low[winner], bands.high[winner]
+
+
+class LazyRangeIndex(RangeIndex):
+    """RangeIndex that builds each test's bands on first lookup.
+
+    ``rows_for(name)`` returns that test's ``(fromage, toage, sextype, low, high)``
+    rows in catalog order, or None for an unknown test. Used with the compiled
+    catalog so a worker only materialises the tests its reports contain.
+    """
+
+    def __init__(self, rows_for):
+        self._rows_for = rows_for
+        self._tests = {}
+
+    def _bands(self, test_name):
+        try: return self._tests[test_name]
+        except KeyError: pass
+        rows = self._rows_for(test_name)
+        bands = self._tests[test_name] = _TestBands(rows) if rows else None
+        return bands
@@ -0,0 +1,257 @@
+"""Summary HTML -> PDF rendering backends and a warm worker pool.
+
+``Renderer`` subclasses turn HTML into PDF bytes. ``RenderPool`` keeps a bounded
+set of long-lived worker processes, each holding one initialised renderer, and
+feeds them jobs from a queue: a worker that crashes is restarted, and a job that
+exceeds the per-job timeout has its worker (and anything it spawned) killed.
+wkhtmltopdf has no server mode, so its backend still execs the binary per job,
+but the pool caps how many run at once instead of forking one per upload.
+"""
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from meesha import config
+from meesha.assets import find_remote_resources
+
+PDF_OPTIONS = {
+    'page-size': 'A4', 'margin-top': '0mm', 'margin-right': '0mm',
+    'margin-bottom': '0mm', 'margin-left': '0mm', 'enable-local-file-access': None
+}
+
+
+class RenderError(RuntimeError):
+    pass
+
+
+class RenderTimeout(RenderError):
+    pass
+
+
+def get_wkhtmltopdf_config():
+    """Locates the PDF engine."""
+    import pdfkit
+    possible_paths = [
+        r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe",
+        r"C:\Program Files (x86)\wkhtmltopdf\bin\wkhtmltopdf.exe",
+    ]
+    for path in possible_paths:
+        if os.path.exists(path):
+            return pdfkit.configuration(wkhtmltopdf=path)
+    path = shutil.which("wkhtmltopdf")
+    if path: return pdfkit.configuration(wkhtmltopdf=path)
+    return None
+
+
+# --- BACKENDS ---
+class Renderer:
+    """Renders summary HTML to PDF bytes; instantiated once per worker."""
+
+    def render(self, html):
+        raise NotImplementedError
+
+
+class WkhtmltopdfRenderer(Renderer):
+    def __init__(self, options=None):
+        import pdfkit
+        self._pdfkit = pdfkit
+        self.config = get_wkhtmltopdf_config()
+        if not self.config: raise RenderError("'wkhtmltopdf' not found.")
+        self.options = dict(PDF_OPTIONS, **(options or {}))
+
+    def render(self, html):
+        if not config.ALLOW_REMOTE_ASSETS:
+            remote = find_remote_resources(html)
+            if remote: raise RenderError(f"summary HTML references remote resources: {', '.join(remote[:3])}")
+        return self._pdfkit.from_string(html, False, configuration=self.config, options=self.options)
+
+
+def _blank_pdf():
+    objs = [b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>"]
+    out = bytearray(b"%PDF-1.4\n"); offsets = []
+    for i, obj in enumerate(objs, 1):
+        offsets.append(len(out)); out += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+class StubRenderer(Renderer):
+    """Returns a blank A4 page without any external binary; for local testing.
+
+    ``delay`` simulates render time; HTML containing ``fail_marker`` raises and
+    HTML containing ``crash_marker`` kills the worker process.
+    """
+    PDF = _blank_pdf()
+
+    def __init__(self, delay=0.0, fail_marker="<!--stub:fail-->", crash_marker="<!--stub:crash-->"):
+        self.delay = delay
+        self.fail_marker = fail_marker
+        self.crash_marker = crash_marker
+
+    def render(self, html):
+        if self.crash_marker and self.crash_marker in html: os._exit(3)
+        if self.fail_marker and self.fail_marker in html: raise RenderError("stub render failure")
+        if self.delay: time.sleep(self.delay)
+        return self.PDF
+
+
+BACKENDS = {"wkhtmltopdf": WkhtmltopdfRenderer, "stub": StubRenderer}
+
+
+def make_renderer(backend=None, **kwargs):
+    """Builds an in-process renderer for the configured backend."""
+    return BACKENDS[backend or config.RENDER_BACKEND](**kwargs)
+
+
+# --- WORKER POOL ---
+def _worker_main(conn, backend, kwargs):
+    if hasattr(os, "setpgrp"): os.setpgrp()  # lets a timeout kill spawned wkhtmltopdf too
+    try:
+        renderer = make_renderer(backend, **kwargs)
+    except Exception as e:
+        conn.send(("init-error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", None))
+    while True:
+        try: html = conn.recv()
+        except (EOFError, OSError): return
+        if html is None: return
+        try: conn.send(("ok", renderer.render(html)))
+        except Exception as e: conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, ctx, backend, kwargs, startup_timeout):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, backend, kwargs), daemon=True)
+        self.process.start()
+        child.close()
+        if not self.conn.poll(startup_timeout):
+            self.kill(); raise RenderError("renderer worker did not start")
+        try: kind, payload = self.conn.recv()
+        except (EOFError, OSError): kind, payload = "init-error", "renderer worker exited during start-up"
+        if kind != "ready":
+            self.kill(); raise RenderError(payload)
+
+    def wait(self, timeout):
+        # Forked siblings may hold copies of our pipe, so a crash does not always
+        # surface as EOF; check liveness between short polls instead.
+        deadline = time.monotonic() + timeout
+        while not self.conn.poll(min(0.1, max(deadline - time.monotonic(), 0))):
+            if not self.process.is_alive(): raise EOFError
+            if time.monotonic() >= deadline: raise RenderTimeout(f"render exceeded {timeout}s")
+
+    def kill(self):
+        pid = self.process.pid
+        if pid and hasattr(os, "killpg"):
+            try: os.killpg(pid, signal.SIGKILL)
+            except OSError: pass
+        if self.process.is_alive(): self.process.kill()
+        self.process.join(5)
+        self.conn.close()
+
+    def stop(self):
+        try: self.conn.send(None)
+        except OSError: pass
+        self.process.join(2)
+        if self.process.is_alive(): self.kill()
+
+
+class RenderPool:
+    """Bounded pool of warm renderer processes fed through a job queue."""
+
+    def __init__(self, backend=None, size=None, timeout=None, renderer_kwargs=None,
+                 start_method=None, startup_timeout=30):
+        self.backend = backend or config.RENDER_BACKEND
+        self.size = size or config.RENDER_POOL_SIZE
+        self.timeout = timeout or config.RENDER_TIMEOUT
+        self.renderer_kwargs = renderer_kwargs or {}
+        self.startup_timeout = startup_timeout
+        self.restarts = 0
+        self._ctx = mp.get_context(start_method or config.RENDER_START_METHOD)
+        self._jobs = queue.Queue()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run_slot, name=f"render-slot-{i}", daemon=True)
+                         for i in range(self.size)]
+        for t in self._threads: t.start()
+
+    def submit(self, html):
+        if self._closed: raise RenderError("render pool is closed")
+        fut = Future()
+        self._jobs.put((html, fut))
+        return fut
+
+    def render(self, html, timeout=None):
+        """Renders and waits; by default no longer than every job queued ahead could take."""
+        if timeout is None:
+            timeout = (self.timeout + self.startup_timeout) * (1 + self._jobs.qsize() // self.size)
+        fut = self.submit(html)
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            fut.cancel()  # skipped by the slots if still queued
+            raise RenderTimeout(f"no render result within {timeout:g}s") from None
+
+    def close(self):
+        self._closed = True
+        for _ in self._threads: self._jobs.put(None)
+        for t in self._threads: t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self):
+        return _Worker(self._ctx, self.backend, self.renderer_kwargs, self.startup_timeout)
+
+    def _run_slot(self):
+        # Nothing may escape this loop: a dead slot would leave its queued futures unresolved.
+        try: worker = self._spawn()
+        except Exception: worker = None  # retried on the first job, which then reports the error
+        while True:
+            job = self._jobs.get()
+            if job is None: break
+            html, fut = job
+            if not fut.set_running_or_notify_cancel(): continue
+            try:
+                if worker is None: worker = self._spawn()
+                worker.conn.send(html)
+                worker.wait(self.timeout)
+                kind, payload = worker.conn.recv()
+            except Exception as e:
+                if worker is None:
+                    error = e if isinstance(e, RenderError) else RenderError(f"could not start renderer worker: {e}")
+                else:
+                    try: worker.kill()
+                    except Exception: pass
+                    worker = None; self.restarts += 1
+                    error = e if isinstance(e, RenderError) else RenderError("renderer worker crashed")
+                fut.set_exception(error); continue
+            if kind == "ok": fut.set_result(payload)
+            else: fut.set_exception(RenderError(payload))
+        if worker is not None: worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """Returns the process-wide pool configured from ``meesha.config``."""
+    global _pool
+    with _pool_lock:
+        if _pool is None: _pool = RenderPool()
+        return _pool
@@ -0,0 +1,121 @@
+"""Structured extraction results, independent of the PDF summary.
+
+    result = extract_results("report.pdf", "test_and_values.csv")
+    result.info.patient_id, [(t.name, t.value, t.status) for t in result.tests]
+
+``extract_results`` runs text extraction and analysis only: no narrative, no
+template, no wkhtmltopdf, no merge. Results serialise to JSON Lines (one report
+per line) and to Arrow/Parquet in long form (one row per test, with the
+report's fields repeated), the layout warehouses load directly. pyarrow is
+only needed, and only imported, for the columnar writers.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass
+
+from meesha.header import HEADER_FIELDS
+from meesha.pipeline import extract_comprehensive_data, load_reference_db
+
+
+@dataclass(frozen=True, slots=True)
+class PatientInfo:
+    patient_name: str = "Unknown"
+    patient_id: str = "Unknown"
+    age_gender: str = "Unknown"
+    doctor: str = "Unknown"
+    date: str = "Unknown"
+
+    @classmethod
+    def from_dict(cls, info):
+        return cls(**{f: str(info.get(f, "Unknown")) for f in HEADER_FIELDS})
+
+
+@dataclass(frozen=True, slots=True)
+class TestResult:
+    name: str
+    value: float
+    range: str
+    status: str
+    css_class: str
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(row["name"], float(row["value"]), row["range"], row["status"], row["css_class"])
+
+
+@dataclass(frozen=True, slots=True)
+class ReportResult:
+    info: PatientInfo
+    tests: tuple
+    source: str = None
+    catalog_version: str = None
+
+    @classmethod
+    def from_pipeline(cls, info, found_tests, source=None, catalog_version=None):
+        """From the ``(info, found_tests)`` dicts the pipeline produces."""
+        return cls(PatientInfo.from_dict(info), tuple(TestResult.from_dict(t) for t in found_tests),
+                   source, catalog_version)
+
+    @property
+    def abnormal(self):
+        return tuple(t for t in self.tests if t.status != "Normal")
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def extract_results(source, csv_path, max_pages=None, name=None, extract_workers=None):
+    """Extraction-only analysis of one report (path or PDF bytes) as a ReportResult."""
+    catalog = load_reference_db(csv_path)
+    info, found_tests = extract_comprehensive_data(source, csv_path, max_pages, extract_workers)
+    if name is None and isinstance(source, (str, os.PathLike)): name = os.fspath(source)
+    return ReportResult.from_pipeline(info, found_tests, name, catalog.version if catalog else None)
+
+
+# --- SERIALISERS ---
+def write_jsonl(results, fp):
+    """Writes one compact JSON object per report to a text file object; returns the count."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    n = 0
+    for r in results:
+        fp.write(dumps(r.to_dict()))
+        fp.write("\n")
+        n += 1
+    return n
+
+
+def read_jsonl(fp):
+    for line in fp:
+        if not line.strip(): continue
+        d = json.loads(line)
+        yield ReportResult(PatientInfo(**d["info"]), tuple(TestResult(**t) for t in d["tests"]),
+                           d.get("source"), d.get("catalog_version"))
+
+
+LONG_COLUMNS = ("source", "catalog_version") + HEADER_FIELDS + ("test", "value", "range", "status", "css_class")
+
+
+def to_columns(results):
+    """Long-form columns (one entry per test) as ``{name: list}``; reports without tests get no rows."""
+    cols = {c: [] for c in LONG_COLUMNS}
+    for r in results:
+        report = (r.source, r.catalog_version) + tuple(getattr(r.info, f) for f in HEADER_FIELDS)
+        for t in r.tests:
+            for c, v in zip(LONG_COLUMNS, report + (t.name, t.value, t.range, t.status, t.css_class)):
+                cols[c].append(v)
+    return cols
+
+
+def to_arrow(results):
+    """A ``pyarrow.Table`` of the results in long form."""
+    import pyarrow as pa
+    cols = to_columns(results)
+    schema = pa.schema([(c, pa.float64() if c == "value" else pa.string()) for c in LONG_COLUMNS])
+    return pa.Table.from_pydict(cols, schema=schema)
+
+
+def write_parquet(results, path, compression="zstd"):
+    import pyarrow.parquet as pq
+    table = to_arrow(results)
+    pq.write_table(table, path, compression=compression)
+    return table.num_rows
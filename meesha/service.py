@@ -0,0 +1,344 @@
+"""Standalone HTTP service exposing the analysis to other systems (LIS, mobile app).
+
+    python -m meesha.service [--host 127.0.0.1] [--port 8080] [--catalog CSV] [--workers N]
+
+Endpoints (uploads are the raw PDF body, or ``multipart/form-data`` with one file):
+
+    POST /v1/results   extraction only; the ReportResult as JSON
+    POST /v1/report    the merged report PDF (summary page(s) + original)
+    GET  /healthz      liveness plus in-flight/coalescing/rejection counters
+
+The server is a single asyncio loop on the standard library's streams: uploads
+are read into memory in chunks as they arrive, and extraction, overlay rendering
+and merging run in a bounded process pool (wkhtmltopdf renders go through the
+shared ``RenderPool``). Concurrent requests for the same upload (same content
+hash, catalog and summary version) are coalesced: only the first starts a
+computation and the rest await its result. Finished reports go into the shared
+result cache, so a repeated upload is served from it.
+
+Backpressure: each upload takes one of ``max_pending`` slots before its body is
+read and keeps it until its computation is in flight (the slot then belongs to
+the computation until it finishes), or until it has joined another request's
+computation or been served from the cache. When all slots are taken new uploads
+get ``429 Too Many Requests`` with ``Retry-After`` before anything is read or
+queued; that includes duplicates of a running computation, whose content is not
+known yet. Uploads over ``MEESHA_SERVICE_MAX_UPLOAD_MB`` get ``413``.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing as mp
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from http import HTTPStatus
+
+from meesha import config
+from meesha.assets import asset_version, logo_b64
+from meesha.cache import cache_key, get_result_cache
+from meesha.extract import extraction_share
+from meesha.history import record_report, report_trends
+from meesha.overlay import LAYOUT_VERSION
+from meesha.pipeline import analyze_report, load_reference_db, merge_pdfs, render_summary_html, render_summary_pdf
+from meesha.profiles import profiles_version
+from meesha.render import get_render_pool
+from meesha.results import extract_results
+from meesha.template import TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+HEADER_LIMIT = 64 * 1024
+MAX_HEADERS = 100
+READ_CHUNK = 256 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = HTTPStatus(status)
+        self.headers = headers or {}
+
+
+def _multipart_file(body, content_type):
+    """``(bytes, filename)`` of the first file part of a multipart/form-data body."""
+    m = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not m: raise HTTPError(400, "multipart body without a boundary")
+    delimiter = b"--" + m.group(1).encode("latin-1")
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b"--"): break
+        head, sep, content = part.partition(b"\r\n\r\n")
+        name = re.search(rb'filename="([^"]*)"', head)
+        if sep and name:
+            return content[:-2] if content.endswith(b"\r\n") else content, name.group(1).decode("utf-8", "replace")
+    raise HTTPError(400, "multipart body has no file part")
+
+
+def _response(status, body, content_type, headers, close):
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}", f"Connection: {'close' if close else 'keep-alive'}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def _json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class Service:
+    def __init__(self, csv_path, workers=None, max_pending=None, max_upload_mb=None, timeout=None):
+        self.csv_path = csv_path
+        self.workers = workers or config.SERVICE_WORKERS
+        self.max_pending = max_pending or config.SERVICE_MAX_PENDING
+        self.max_upload = (max_upload_mb or config.SERVICE_MAX_UPLOAD_MB) * 1024 * 1024
+        self.timeout = timeout or config.SERVICE_TIMEOUT
+        self.logo_b64 = logo_b64()
+        self.stats = {"requests": 0, "computed": 0, "coalesced": 0, "cache_hits": 0, "rejected": 0, "failed": 0}
+        self._inflight = {}
+        self._admitted = 0  # requests holding a slot before their computation is in flight
+        self._uploads = 0
+        self._connections = {}  # handler task -> its writer
+        self._pool = None
+        self._server = None
+
+    def _new_pool(self):
+        # Workers are spawned, not forked: the loop's own threads must not leak into them.
+        return ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                   initializer=load_reference_db, initargs=(self.csv_path,))
+
+    async def start(self, host=None, port=None):
+        self._pool = self._new_pool()
+        self._server = await asyncio.start_server(self._handle, host or config.SERVICE_HOST,
+                                                  config.SERVICE_PORT if port is None else port, limit=HEADER_LIMIT)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise hold their handlers open.
+            for writer in list(self._connections.values()): writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+        if self._pool is not None: self._pool.shutdown(cancel_futures=True)
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    # --- HTTP ---
+    async def _handle(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_head(reader), config.SERVICE_IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except HTTPError as e:
+                    writer.write(_response(e.status, _json({"error": str(e)}), "application/json", {}, True))
+                    break
+                if request is None: break
+                method, target, version, headers = request
+                close = version == "HTTP/1.0" or headers.get("connection", "").lower() == "close"
+                self.stats["requests"] += 1
+                try:
+                    status, body, content_type, extra = await self._dispatch(method, target, headers, reader, writer)
+                except HTTPError as e:
+                    # The body may be unread, so the connection cannot be reused.
+                    status, body, content_type, extra, close = e.status, _json({"error": str(e)}), \
+                        "application/json", e.headers, True
+                    if status == HTTPStatus.TOO_MANY_REQUESTS: self.stats["rejected"] += 1
+                except Exception as e:
+                    logger.exception("%s %s failed", method, target)
+                    self.stats["failed"] += 1
+                    status, body, content_type, extra, close = HTTPStatus.INTERNAL_SERVER_ERROR, \
+                        _json({"error": f"{type(e).__name__}: {e}"}), "application/json", {}, True
+                writer.write(_response(status, body, content_type, extra, close))
+                await writer.drain()
+                if close: break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_head(self, reader):
+        try:
+            line = await reader.readline()
+            if not line: return None
+            method, target, version = line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""): break
+                if len(headers) >= MAX_HEADERS: raise HTTPError(431, "too many headers")
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except ValueError:  # unparsable request line, or a line over HEADER_LIMIT
+            raise HTTPError(400, "malformed request")
+        return method, target, version, headers
+
+    async def _read_body(self, reader, writer, headers):
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "chunked uploads are not supported; send Content-Length")
+        try: length = int(headers["content-length"])
+        except (KeyError, ValueError): raise HTTPError(411, "Content-Length required")
+        if length > self.max_upload: raise HTTPError(413, f"upload exceeds {self.max_upload // (1024 * 1024)} MB")
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        self._uploads += 1
+        try:
+            body = bytearray()
+            while len(body) < length:
+                chunk = await asyncio.wait_for(reader.read(min(READ_CHUNK, length - len(body))),
+                                               config.SERVICE_IDLE_TIMEOUT)
+                if not chunk: raise HTTPError(400, "upload ended early")
+                body += chunk
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "upload stalled")
+        finally:
+            self._uploads -= 1
+        return bytes(body)
+
+    async def _read_pdf(self, reader, writer, headers):
+        body = await self._read_body(reader, writer, headers)
+        content_type, name = headers.get("content-type", ""), headers.get("x-filename")
+        if content_type.startswith("multipart/form-data"): body, name = _multipart_file(body, content_type)
+        if not body[:1024].lstrip().startswith(b"%PDF"): raise HTTPError(415, "expected a PDF upload")
+        return body, name
+
+    async def _dispatch(self, method, target, headers, reader, writer):
+        path = target.partition("?")[0]
+        routes = {"/healthz": "GET", "/v1/results": "POST", "/v1/report": "POST"}
+        if path not in routes: raise HTTPError(404, f"no route {path}")
+        if method != routes[path]: raise HTTPError(405, f"{path} accepts {routes[path]}", {"Allow": routes[path]})
+
+        if path == "/healthz":
+            return HTTPStatus.OK, _json(self.health()), "application/json", {}
+        if self._admitted + len(self._inflight) >= self.max_pending:
+            raise HTTPError(429, "too many requests in progress", {"Retry-After": 1})
+        self._admitted += 1
+        admitted = True
+
+        def start(key, compute):
+            # No await between giving up the slot and _run_once registering the computation.
+            nonlocal admitted
+            self._admitted -= 1; admitted = False
+            return self._run_once(key, compute)
+
+        try:
+            data, name = await self._read_pdf(reader, writer, headers)
+            catalog = await asyncio.to_thread(load_reference_db, self.csv_path)
+            version = catalog.version if catalog else None
+            if path == "/v1/results":
+                key = cache_key(data, version, "results")
+                result, coalesced = await start(key, lambda: self._results(data, name))
+                return HTTPStatus.OK, _json(result.to_dict()), "application/json", {"X-Meesha-Coalesced": int(coalesced)}
+
+            summary = LAYOUT_VERSION if config.RENDER_BACKEND == "overlay" else TEMPLATE_VERSION
+            key = cache_key(data, version, f"{summary}:{asset_version()}:{profiles_version()}")
+            cache = get_result_cache()
+            report = await asyncio.to_thread(cache.get_report, key)
+            if report is not None:
+                self.stats["cache_hits"] += 1
+                coalesced = False
+            else:
+                report, coalesced = await start(key, lambda: self._report(data, key))
+        finally:
+            if admitted: self._admitted -= 1
+        stem = os.path.splitext(os.path.basename(name or "report.pdf"))[0]
+        return HTTPStatus.OK, report["pdf"], "application/pdf", {
+            "X-Meesha-Coalesced": int(coalesced), "X-Meesha-Tests": len(report["full_results"]),
+            "Content-Disposition": f'attachment; filename="Meesha_Analysis_{stem}.pdf"'}
+
+    def health(self):
+        return dict(self.stats, status="ok", inflight=len(self._inflight), uploads=self._uploads,
+                    workers=self.workers, max_pending=self.max_pending)
+
+    # --- COMPUTATION ---
+    async def _run_once(self, key, compute):
+        """Awaits the computation for key, starting it only if none is in flight; ``(result, coalesced)``."""
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.stats["coalesced"] += 1
+        else:
+            # Capacity was checked when the request was admitted (see _dispatch).
+            task = self._inflight[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda t: self._finished(key, t))
+        try:
+            # shield: a client that gives up must not cancel the others' computation.
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout), coalesced
+        except asyncio.TimeoutError:
+            raise HTTPError(504, f"analysis exceeded {self.timeout}s")
+
+    def _finished(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None: self.stats["computed"] += 1
+
+    def _cpu(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return loop.run_in_executor(self._pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); the requests it held have failed, later ones get a new pool.
+            logger.warning("worker pool broken; starting a new one")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            return loop.run_in_executor(self._pool, fn, *args)
+
+    def _extract_share(self):
+        # The other analyses in flight each hold a core; a large upload may use the rest.
+        return extraction_share(len(self._inflight) - 1)
+
+    async def _results(self, data, name):
+        return await self._cpu(extract_results, data, self.csv_path, None, name, self._extract_share())
+
+    async def _report(self, data, key):
+        info, full_results, narrative = await self._cpu(analyze_report, data, self.csv_path, self._extract_share())
+        trends = await asyncio.to_thread(report_trends, info, full_results)
+        if config.RENDER_BACKEND == "overlay":
+            summary = await self._cpu(render_summary_pdf, info, full_results, narrative, self.logo_b64, trends)
+        else:
+            html = await asyncio.to_thread(render_summary_html, info, full_results, narrative, self.logo_b64, trends)
+            summary = await asyncio.wrap_future(get_render_pool().submit(html))
+        pdf = await self._cpu(merge_pdfs, summary, data)
+        await asyncio.to_thread(record_report, info, full_results, data)
+        report = {"info": info, "full_results": full_results, "narrative": narrative, "trends": trends, "pdf": pdf}
+        await asyncio.to_thread(get_result_cache().put_report, key, report)
+        return report
+
+
+async def serve(service, host=None, port=None):
+    server = await service.start(host, port)
+    logger.info("listening on %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    import argparse
+    from meesha.batch import REPO_DIR
+
+    parser = argparse.ArgumentParser(description="HTTP analysis service.")
+    parser.add_argument("--host", default=config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVICE_PORT)
+    parser.add_argument("--catalog", default=os.path.join(REPO_DIR, "test_and_values.csv"))
+    parser.add_argument("--workers", type=int, default=config.SERVICE_WORKERS)
+    parser.add_argument("--max-pending", type=int, default=config.SERVICE_MAX_PENDING)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if not os.path.exists(args.catalog): parser.error(f"catalog not found: {args.catalog}")
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve(Service(args.catalog, args.workers, args.max_pending), args.host, args.port))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""Summary-page templates and the process-wide compiled-template registry.
+
+Templates are registered under ``(name, version)`` and compiled once per process
+by a shared Jinja environment; with ``MEESHA_TEMPLATE_CACHE_DIR`` set, the compiled
+bytecode is also shared across processes and restarts.
+"""
+import hashlib
+import os
+import threading
+
+from meesha import config
+from meesha.assets import font_face_css
+
+# --- VISUALLY STUNNING HTML TEMPLATE (PREMIUM EDITION) ---
+HTML_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Meesha Health Analysis</title>
+    <style>
+        /* Outfit is inlined from meesha/fonts: render hosts are offline. */
+        {{ font_css() }}
+        
+        :root {
+            /* REFINED PALETTE */
+            --brand: #00BBD4; 
+            --brand-dark: #00838f;
+            --brand-soft: #e0f7fa;
+            
+            --dark: #1e293b; 
+            --text: #334155; 
+            --text-light: #64748b;
+            
+            --bg-page: #f8fafc;
+            --card-bg: #ffffff;
+            
+            --danger: #ef4444; --danger-soft: #fef2f2;
+            --warning: #f59e0b; --warning-soft: #fffbeb;
+            --success: #10b981; --success-soft: #f0fdf4;
+        }
+
+        body { font-family: 'Outfit', sans-serif; margin: 0; padding: 0; background: var(--bg-page); color: var(--text); }
+        .page { width: 210mm; min-height: 297mm; padding: 12mm 15mm; margin: 0 auto; background: white; position: relative; overflow: hidden; box-sizing: border-box; }
+
+        /* HEADER - CLEAN & PREMIUM */
+        .header { 
+            display: flex; justify-content: space-between; align-items: center; 
+            padding-bottom: 25px; border-bottom: 2px solid #f1f5f9; margin-bottom: 35px; 
+        }
+        
+        .logo-container { display: flex; align-items: center; gap: 15px; }
+        .logo-img { height: 65px; width: auto; object-fit: contain; } /* Optimized for new logo */
+        
+        .header-meta { text-align: right; }
+        .report-title { font-size: 10px; font-weight: 800; color: var(--brand); letter-spacing: 2px; text-transform: uppercase; margin-bottom: 4px; }
+        .report-date { font-size: 12px; font-weight: 600; color: var(--text-light); }
+
+        /* MAIN LAYOUT GRID */
+        .main-grid { display: grid; grid-template-columns: 1.8fr 1.2fr; gap: 30px; }
+        .left-col { display: flex; flex-direction: column; gap: 25px; }
+        .right-col { display: flex; flex-direction: column; gap: 25px; }
+
+        /* CARD COMPONENT */
+        .card { 
+            background: white; border-radius: 16px; padding: 24px; 
+            box-shadow: 0 10px 30px -5px rgba(0,0,0,0.04); border: 1px solid #f1f5f9;
+            position: relative; overflow: hidden;
+        }
+        
+        .card-header { display: flex; align-items: center; gap: 8px; margin-bottom: 18px; }
+        .card-title { font-size: 11px; font-weight: 800; color: #94a3b8; text-transform: uppercase; letter-spacing: 1px; }
+        .card-icon { color: var(--brand); font-size: 14px; }
+
+        /* PATIENT PROFILE - ELEGANT GRID */
+        .profile-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 15px; }
+        .profile-item { }
+        .pi-label { font-size: 9px; color: var(--text-light); font-weight: 600; text-transform: uppercase; margin-bottom: 3px; }
+        .pi-value { font-size: 14px; font-weight: 700; color: var(--dark); }
+
+        /* AI SUMMARY - HIGHLIGHT BOX */
+        .summary-card { 
+            background: linear-gradient(135deg, #ffffff 0%, #f8fdfe 100%); 
+            border: 1px solid #e0f2fe; position: relative;
+        }
+        .summary-card::before {
+            content: ''; position: absolute; left: 0; top: 0; bottom: 0; width: 4px; 
+            background: var(--brand); border-radius: 4px 0 0 4px;
+        }
+        .summary-text { font-size: 13px; line-height: 1.7; color: var(--text); font-weight: 400; }
+        
+        /* Text Highlights */
+        .hl-crit { color: var(--danger); font-weight: 700; }
+        .hl-brand { color: var(--brand-dark); font-weight: 700; }
+
+        /* IMPACT ZONES - MODERN CARDS */
+        .zone-grid { display: grid; grid-template-columns: 1fr 1fr; gap: 12px; }
+        .zone-box { 
+            background: #f8fafc; border: 1px solid #e2e8f0; border-radius: 12px; 
+            padding: 12px; display: flex; align-items: center; gap: 12px; transition: 0.2s;
+        }
+        .zone-box.active { 
+            background: #fff5f5; border-color: #fecaca; 
+            box-shadow: 0 4px 12px rgba(239, 68, 68, 0.08); 
+        }
+        
+        .z-icon { 
+            width: 36px; height: 36px; background: white; border-radius: 10px; 
+            display: flex; align-items: center; justify-content: center; font-size: 18px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.03); filter: grayscale(100%); opacity: 0.5;
+        }
+        .zone-box.active .z-icon { filter: grayscale(0%); opacity: 1; background: #fee2e2; }
+        
+        .z-label { font-size: 11px; font-weight: 700; color: var(--text-light); }
+        .zone-box.active .z-label { color: var(--danger); }
+
+        /* CRITICAL METRICS - GAUGES */
+        .alert-card { 
+            background: white; border-radius: 12px; padding: 15px; margin-bottom: 12px; 
+            border: 1px solid #f1f5f9; border-left: 4px solid transparent;
+        }
+        .alert-card.crit { border-left-color: var(--danger); background: var(--danger-soft); }
+        .alert-card.warn { border-left-color: var(--warning); background: var(--warning-soft); }
+        
+        .ac-head { display: flex; justify-content: space-between; align-items: center; margin-bottom: 6px; }
+        .ac-name { font-size: 12px; font-weight: 700; color: var(--dark); }
+        .ac-pill { font-size: 9px; font-weight: 800; text-transform: uppercase; padding: 3px 8px; border-radius: 6px; background: white; }
+        .crit .ac-pill { color: var(--danger); box-shadow: 0 2px 4px rgba(239, 68, 68, 0.1); }
+        .warn .ac-pill { color: #b45309; box-shadow: 0 2px 4px rgba(245, 158, 11, 0.1); }
+        
+        .ac-data { display: flex; align-items: baseline; gap: 6px; }
+        .ac-val { font-size: 18px; font-weight: 800; color: var(--dark); }
+        .ac-ref { font-size: 10px; color: var(--text-light); }
+        
+        /* TABLE - CLEAN DESIGN */
+        .table-wrap { margin-top: 15px; border-radius: 12px; overflow: hidden; border: 1px solid #e2e8f0; }
+        table { width: 100%; border-collapse: collapse; font-size: 11px; }
+        th { text-align: left; padding: 12px 16px; background: #f8fafc; color: var(--text-light); font-weight: 700; text-transform: uppercase; font-size: 10px; border-bottom: 1px solid #e2e8f0; }
+        td { padding: 12px 16px; border-bottom: 1px solid #f1f5f9; color: var(--dark); font-weight: 500; }
+        tr:last-child td { border-bottom: none; }
+        
+        .row-crit { background: #fffbfb; }
+        
+        .status-dot { height: 8px; width: 8px; border-radius: 50%; display: inline-block; margin-right: 6px; }
+        .s-crit { background: var(--danger); }
+        .s-warn { background: var(--warning); }
+        .s-norm { background: var(--success); }
+
+        .footer { margin-top: 50px; padding-top: 20px; border-top: 1px solid #f1f5f9; text-align: center; font-size: 10px; color: #cbd5e1; font-weight: 500; letter-spacing: 0.5px; }
+    </style>
+</head>
+<body>
+
+<div class="page">
+    
+    <!-- HEADER -->
+    <div class="header">
+        <div class="logo-container">
+            {% if logo_b64 %}
+                <img src="data:image/png;base64,{{ logo_b64 }}" class="logo-img" alt="Meesha Logo">
+            {% else %}
+                <h1 style="color:var(--brand); margin:0;">MEESHA</h1>
+            {% endif %}
+        </div>
+        <div class="header-meta">
+            <div class="report-title">AI Clinical Analysis</div>
+            <div class="report-date">{{ report_date }}</div>
+        </div>
+    </div>
+
+    <!-- MAIN GRID -->
+    <div class="main-grid">
+        
+        <!-- LEFT COLUMN -->
+        <div class="left-col">
+            
+            <!-- 1. PATIENT PROFILE -->
+            <div class="card">
+                <div class="card-header">
+                    <span class="card-icon">👤</span>
+                    <span class="card-title">Patient Profile</span>
+                </div>
+                <div class="profile-grid">
+                    <div class="profile-item">
+                        <div class="pi-label">Patient Name</div>
+                        <div class="pi-value">{{ patient_name }}</div>
+                    </div>
+                    <div class="profile-item">
+                        <div class="pi-label">Patient ID</div>
+                        <div class="pi-value">{{ patient_id }}</div>
+                    </div>
+                    <div class="profile-item">
+                        <div class="pi-label">Age / Gender</div>
+                        <div class="pi-value">{{ patient_age_gender }}</div>
+                    </div>
+                    <div class="profile-item">
+                        <div class="pi-label">Referred By</div>
+                        <div class="pi-value">{{ doctor_name }}</div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- 2. AI SUMMARY -->
+            <div class="card summary-card">
+                <div class="card-header">
+                    <span class="card-icon">🤖</span>
+                    <span class="card-title" style="color:var(--brand-dark);">Clinical Insight</span>
+                </div>
+                <div class="summary-text">
+                    {{ narrative }}
+                </div>
+            </div>
+
+            <!-- 3. COMPREHENSIVE TABLE -->
+            <div style="margin-top:10px;">
+                <div class="card-title" style="margin-bottom:10px; padding-left:5px;">📊 Comprehensive Test List</div>
+                <div class="table-wrap">
+                    <table>
+                        <thead>
+                            <tr>
+                                <th width="45%">Test Name</th>
+                                <th width="25%">Result</th>
+                                <th width="30%">Status</th>
+                            </tr>
+                        </thead>
+                        <tbody>
+                            {% for test in full_results %}
+                            <tr class="{% if 'Crit' in test.status %}row-crit{% endif %}">
+                                <td>{{ test.name }}</td>
+                                <td>
+                                    <strong>{{ test.value }}</strong> 
+                                    <span style="font-size:9px; color:#94a3b8; margin-left:4px;">(Ref: {{ test.range }})</span>
+                                    {% if test.name in trends %}{% set trend = trends[test.name] %}
+                                    <span style="font-size:9px; color:#64748b; margin-left:4px;">{{ trend.arrow }} {{ '%+g'|format(trend.delta) }} vs {{ trend.previous_date }}</span>
+                                    {% endif %}
+                                </td>
+                                <td>
+                                    {% if 'Crit' in test.status %}
+                                        <span style="color:var(--danger); font-weight:700; font-size:10px;"><span class="status-dot s-crit"></span>CRITICAL</span>
+                                    {% elif 'Normal' in test.status %}
+                                        <span style="color:var(--success); font-weight:700; font-size:10px;"><span class="status-dot s-norm"></span>NORMAL</span>
+                                    {% else %}
+                                        <span style="color:var(--warning); font-weight:700; font-size:10px;"><span class="status-dot s-warn"></span>ABNORMAL</span>
+                                    {% endif %}
+                                </td>
+                            </tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+            </div>
+
+        </div>
+
+        <!-- RIGHT COLUMN -->
+        <div class="right-col">
+            
+            <!-- 4. IMPACT ZONES -->
+            <div class="card">
+                <div class="card-header">
+                    <span class="card-icon">⚡</span>
+                    <span class="card-title">Impact Zones</span>
+                </div>
+                <div class="zone-grid">
+                    <div class="zone-box {% if 'heart' in body_flags %}active{% endif %}">
+                        <div class="z-icon">🫀</div>
+                        <div class="z-label">Heart</div>
+                    </div>
+                    <div class="zone-box {% if 'liver' in body_flags %}active{% endif %}">
+                        <div class="z-icon">🧪</div>
+                        <div class="z-label">Liver</div>
+                    </div>
+                    <div class="zone-box {% if 'kidney' in body_flags %}active{% endif %}">
+                        <div class="z-icon">💧</div>
+                        <div class="z-label">Kidney</div>
+                    </div>
+                    <div class="zone-box {% if 'blood' in body_flags %}active{% endif %}">
+                        <div class="z-icon">🩸</div>
+                        <div class="z-label">Blood</div>
+                    </div>
+                    <div class="zone-box {% if 'bone' in body_flags %}active{% endif %}">
+                        <div class="z-icon">🦴</div>
+                        <div class="z-label">Bone</div>
+                    </div>
+                    <div class="zone-box {% if 'neuro' in body_flags %}active{% endif %}">
+                        <div class="z-icon">🧠</div>
+                        <div class="z-label">Neuro</div>
+                    </div>
+                </div>
+            </div>
+
+            <!-- 5. CRITICAL FINDINGS -->
+            {% if critical_tests %}
+            <div class="card" style="border-color: var(--danger-soft);">
+                <div class="card-header">
+                    <span class="card-icon" style="color:var(--danger);">⚠️</span>
+                    <span class="card-title" style="color:var(--danger);">Action Required</span>
+                </div>
+                
+                {% for test in critical_tests %}
+                <div class="alert-card {% if 'Crit' in test.status %}crit{% else %}warn{% endif %}">
+                    <div class="ac-head">
+                        <span class="ac-name">{{ test.name }}</span>
+                        <span class="ac-pill">{{ test.status }}</span>
+                    </div>
+                    <div class="ac-data">
+                        <span class="ac-val">{{ test.value }}</span>
+                        <span class="ac-ref">Ref: {{ test.range }}</span>
+                    </div>
+                </div>
+                {% endfor %}
+            </div>
+            {% endif %}
+
+        </div>
+    </div>
+
+    <div class="footer">
+        Generated by Meesha Diagnostics AI • This summary is for informational support only.
+    </div>
+</div>
+
+</body>
+</html>
+"""
+
+# --- TEMPLATE REGISTRY ---
+_sources = {}
+_lock = threading.Lock()
+_env = None
+
+
+def register_template(name, version, source):
+    """Adds (or replaces) a template version; it is compiled on first use."""
+    with _lock:
+        _sources[(name, version)] = source
+        if _env is not None: _env.cache.clear()
+
+
+def template_version(name="summary", version=None):
+    """Content hash of a registered template, for cache keys."""
+    source = _sources[(name, version or config.SUMMARY_TEMPLATE_VERSION)]
+    return hashlib.sha256(source.encode()).hexdigest()[:12]
+
+
+def _load(key):
+    name, _, version = key.partition("@")
+    source = _sources.get((name, version))
+    if source is None: return None
+    return source, None, lambda: _sources.get((name, version)) is source
+
+
+def get_environment():
+    global _env
+    with _lock:
+        if _env is None:
+            from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader
+            cache = None
+            if config.TEMPLATE_CACHE_DIR:
+                os.makedirs(config.TEMPLATE_CACHE_DIR, exist_ok=True)
+                cache = FileSystemBytecodeCache(config.TEMPLATE_CACHE_DIR)
+            _env = Environment(loader=FunctionLoader(_load), bytecode_cache=cache, auto_reload=False)
+            _env.globals["font_css"] = font_face_css
+        return _env
+
+
+def get_template(name="summary", version=None):
+    """Returns the compiled template; Jinja's environment cache keeps it after the first call."""
+    return get_environment().get_template(f"{name}@{version or config.SUMMARY_TEMPLATE_VERSION}")
+
+
+register_template("summary", "v1", HTML_TEMPLATE)
+
+# Any edit to the active template changes cached report keys.
+TEMPLATE_VERSION = template_version()